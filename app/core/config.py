@@ -6,6 +6,77 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Development only: create missing tables at startup. Migrations (alembic upgrade
+    # head) own the schema everywhere else.
+    DEV_CREATE_TABLES: bool = False
+    # Postgres row-level security on tenant tables (see app/db/tenant.py)
+    TENANT_RLS_ENABLED: bool = False
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # OTP request coalescing (app/services/auth_service.py)
+    OTP_REUSE_SECONDS: int = 120
+    OTP_RESEND_COOLDOWN_SECONDS: int = 30
+
+    # Task history retention
+    TASK_EVENT_COMPACT_AFTER_DAYS: int = 90
+    TASK_EVENT_RETENTION_DAYS: int = 730
+
+    # Task archival / soft-delete purge
+    TASK_ARCHIVE_AFTER_DAYS: int = 30
+    TASK_HARD_DELETE_AFTER_DAYS: int = 7
+
+    # Hash partitions for the tasks default partition; 0 keeps tasks unpartitioned.
+    # Applied by migration 0003 (see app/db/partitioning.py).
+    TASKS_HASH_PARTITIONS: int = 0
+
+    # Idempotency-Key handling for retried writes
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_LEASE_SECONDS: int = 30
+
+    # Process model (gunicorn.conf.py). WEB_CONCURRENCY is exported by the gunicorn
+    # config; DB_MAX_CONNECTIONS is split across workers, keep it below Postgres
+    # max_connections minus what other clients need.
+    WEB_CONCURRENCY: int = 1
+    DB_MAX_CONNECTIONS: int = 80
+    DB_POOL_TIMEOUT: int = 10
+    GRACEFUL_TIMEOUT: int = 30
+    EMAIL_DRAIN_SECONDS: int = 10
+
+    # Usage metering and plan quotas (app/services/metering_service.py)
+    QUOTAS_ENABLED: bool = True
+    METERING_FLUSH_SECONDS: int = 15
+    METERING_CACHE_SECONDS: int = 60
+
+    # User/Company lookup cache (app/db/entity_cache.py)
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_MAX_ENTRIES: int = 10000
+    ENTITY_CACHE_TTL_SECONDS: int = 30
+    ENTITY_CACHE_NEGATIVE_TTL_SECONDS: int = 10
+
+    # GET /reports/tasks (app/services/report_service.py)
+    REPORT_CACHE_SECONDS: int = 60
+
+    # Request profiling (app/middleware/profiling.py); off means not installed at all
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_BUFFER_SIZE: int = 50
+    PROFILING_TRACEMALLOC: bool = True
+
+    # GET /metrics: operator bearer token for the Prometheus scraper; empty disables the endpoint
+    METRICS_TOKEN: str = ""
+
+    # Response compression (app/middleware/compression.py)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # Background scheduler (app/jobs/scheduler.py)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TICK_SECONDS: int = 30
+    SCHEDULER_TICK_BUDGET_SECONDS: int = 10
+    UNVERIFIED_ACCOUNT_TTL_HOURS: int = 48
+    TASK_REMINDER_LEAD_HOURS: int = 24
 
     # Email (FastMail / SMTP)
     MAIL_USERNAME: str
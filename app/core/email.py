@@ -1,3 +1,6 @@
+import asyncio
+from typing import Set
+
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from app.core.config import settings
 
@@ -15,6 +18,25 @@ mail_config = ConnectionConfig(
 
 fm = FastMail(mail_config)
 
+_pending_sends: Set[asyncio.Future] = set()
+
+
+async def _send(message: MessageSchema) -> None:
+    # Shielded and tracked: a cancelled request (client gone, worker shutting down)
+    # does not cut off an email mid-send, and drain_email_sends() waits for it.
+    send = asyncio.ensure_future(fm.send_message(message))
+    _pending_sends.add(send)
+    send.add_done_callback(_pending_sends.discard)
+    await asyncio.shield(send)
+
+
+async def drain_email_sends(timeout: float) -> int:
+    """Wait up to `timeout` seconds for in-flight sends; returns how many were still pending."""
+    if not _pending_sends:
+        return 0
+    _, pending = await asyncio.wait(set(_pending_sends), timeout=timeout)
+    return len(pending)
+
 
 async def send_otp_email(
     email_to: str,
@@ -58,7 +80,7 @@ async def send_otp_email(
         body=body,
         subtype=MessageType.html,
     )
-    await fm.send_message(message)
+    await _send(message)
 
 
 async def send_invite_email(
@@ -102,5 +124,33 @@ async def send_invite_email(
         body=body,
         subtype=MessageType.html,
     )
-    await fm.send_message(message)
+    await _send(message)
+
 
+async def send_task_reminder_email(
+    email_to: str,
+    name: str,
+    task_title: str,
+    due_date: str,
+) -> None:
+    """Remind an assignee that one of their tasks is due soon."""
+    body = f"""
+    <html>
+      <body style="font-family: Arial, sans-serif; padding: 24px; background: #f9f9f9;">
+        <div style="max-width:480px; margin:auto; background:#fff; border-radius:10px; padding:32px; box-shadow:0 2px 8px rgba(0,0,0,0.08);">
+          <h2 style="color:#4F46E5; margin-top:0;">Task due soon</h2>
+          <p style="color:#444;">Hi <strong>{name}</strong>,</p>
+          <p style="color:#444;">Your task <strong>{task_title}</strong> is due on <strong>{due_date}</strong> (UTC).</p>
+          <hr style="border:none; border-top:1px solid #eee; margin:24px 0;">
+          <p style="color:#aaa; font-size:12px;">You are receiving this because the task is assigned to you in TaskSphere.</p>
+        </div>
+      </body>
+    </html>
+    """
+    message = MessageSchema(
+        subject=f"Reminder: {task_title} is due soon",
+        recipients=[email_to],
+        body=body,
+        subtype=MessageType.html,
+    )
+    await _send(message)
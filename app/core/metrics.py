@@ -0,0 +1,69 @@
+"""
+Minimal in-process metrics registry, exposed in Prometheus text format at /metrics.
+
+Values are per worker process; scrape every worker (or aggregate downstream).
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(lambda: defaultdict(float))
+        self._gauges: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+        # name -> labels -> [count, sum, max]
+        self._timings: Dict[str, Dict[LabelKey, list]] = defaultdict(dict)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        with self._lock:
+            self._counters[name][_key(labels)] += value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[name][_key(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        with self._lock:
+            stats = self._timings[name].setdefault(_key(labels), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_key(labels), 0)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f"{name}{_format_labels(k)} {v:g}" for k, v in series.items())
+            for name, series in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {name} gauge")
+                lines.extend(f"{name}{_format_labels(k)} {v:g}" for k, v in series.items())
+            for name, series in sorted(self._timings.items()):
+                lines.append(f"# TYPE {name} summary")
+                for k, (count, total, peak) in series.items():
+                    labels = _format_labels(k)
+                    lines.append(f"{name}_count{labels} {count}")
+                    lines.append(f"{name}_sum{labels} {total:.6f}")
+                    lines.append(f"{name}_max{labels} {peak:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -1,3 +1,5 @@
+import hashlib
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -32,3 +34,13 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+def generate_refresh_token() -> str:
+    return secrets.token_urlsafe(48)
+
+
+def hash_refresh_token(token: str) -> str:
+    # Refresh tokens are 384 bits of randomness, so a single SHA-256 is enough
+    # to keep them unusable if the table leaks — no bcrypt on the refresh path.
+    return hashlib.sha256(token.encode()).hexdigest()
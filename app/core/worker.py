@@ -0,0 +1,17 @@
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+
+class VoltaskWorker(UvicornWorker):
+    """
+    Gunicorn worker on uvloop + httptools (both shipped with uvicorn[standard]).
+
+    On SIGTERM uvicorn stops accepting, waits up to GRACEFUL_TIMEOUT for in-flight
+    requests, then runs the app's shutdown hook (scheduler stop, email drain).
+    """
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": settings.GRACEFUL_TIMEOUT,
+    }
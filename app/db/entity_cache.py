@@ -0,0 +1,206 @@
+"""
+Process-local cache of `User` and `Company` rows, keyed by id and by email.
+
+Lookups return an instance attached to the caller's session: a cache hit is
+re-attached with `merge(load=False)` and costs no query. The database is
+always searched across tenants, so cached entries (including "no such row"
+entries, kept for ENTITY_CACHE_NEGATIVE_TTL_SECONDS to absorb enumeration
+floods) are global facts. Tenant scoping is applied to the result instead.
+
+Entries are evicted LRU beyond ENTITY_CACHE_MAX_ENTRIES and expire after
+ENTITY_CACHE_TTL_SECONDS. Rows changed through the ORM are invalidated when the
+transaction commits (after_commit). Bulk UPDATE/DELETE statements on these
+models clear the whole entity's cache unless run with
+`.execution_options(skip_cache_invalidation=True)` (only for statements that
+touch no cached column). Other workers only see a change once their entry
+expires, which bounds staleness at the TTL. In particular a "no such row" entry
+can keep rejecting a just-registered email on other workers for up to
+ENTITY_CACHE_NEGATIVE_TTL_SECONDS.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.exc import ObjectDeletedError, StaleDataError
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.tenant import TENANT_KEY
+from app.models.company import Company
+from app.models.user import User
+
+# Password hashes, the hot open_task_count counter and is_active are not cached.
+# A cache hit reads them with one primary-key query, which also confirms the row
+# still exists. get_current_user checks is_active on every request, so a
+# deactivation applies on all workers at once.
+_COLUMNS = {
+    User: ("id", "name", "email", "role", "company_id", "must_change_password", "created_at"),
+    Company: ("id", "name", "plan", "created_at"),
+}
+_UNCACHED = {
+    model: [column.key for column in model.__table__.columns if column.key not in columns]
+    for model, columns in _COLUMNS.items()
+}
+_LOOKUP_FIELDS = {User: ("id", "email"), Company: ("id",)}
+_MISSING = object()
+_PENDING = "entity_cache_pending"
+
+
+class _LRUCache:
+    def __init__(self):
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > settings.ENTITY_CACHE_MAX_ENTRIES:
+                self._data.popitem(last=False)
+                metrics.inc("entity_cache_evictions_total")
+
+    def discard(self, key: tuple) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear_entity(self, entity: str) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k[0] == entity]:
+                del self._data[key]
+
+
+_cache = _LRUCache()
+
+
+def _entity(model) -> str:
+    return model.__tablename__
+
+
+def _keys(model, values: dict):
+    return [(_entity(model), field, values[field]) for field in _LOOKUP_FIELDS[model]]
+
+
+def _attach(db: Session, model, snapshot: dict):
+    existing = db.identity_map.get(db.identity_key(model, snapshot["id"]))
+    if existing is not None:
+        return existing
+    instance = model(**snapshot)
+    make_transient_to_detached(instance)
+    return db.merge(instance, load=False)
+
+
+def _lookup(db: Session, model, field: str, value, all_tenants: bool):
+    entity = _entity(model)
+    key = (entity, field, value)
+    cached = _cache.get(key) if settings.ENTITY_CACHE_ENABLED else None
+
+    if cached is _MISSING:
+        metrics.inc("entity_cache_requests_total", entity=entity, result="negative_hit")
+        return None
+    if cached is not None:
+        metrics.inc("entity_cache_requests_total", entity=entity, result="hit")
+        instance = _attach(db, model, cached)
+    else:
+        metrics.inc("entity_cache_requests_total", entity=entity, result="miss")
+        instance = (
+            db.query(model)
+            .filter(getattr(model, field) == value)
+            .execution_options(all_tenants=True)
+            .first()
+        )
+        if settings.ENTITY_CACHE_ENABLED:
+            if instance is None:
+                _cache.put(key, _MISSING, settings.ENTITY_CACHE_NEGATIVE_TTL_SECONDS)
+            else:
+                snapshot = {column: getattr(instance, column) for column in _COLUMNS[model]}
+                for k in _keys(model, snapshot):
+                    _cache.put(k, snapshot, settings.ENTITY_CACHE_TTL_SECONDS)
+        if instance is None:
+            return None
+
+    company_id = db.info.get(TENANT_KEY)
+    if model is User and not all_tenants and company_id is not None and instance.company_id != company_id:
+        return None
+
+    if cached is not None and _UNCACHED[model]:
+        try:
+            getattr(instance, _UNCACHED[model][0])  # loads all uncached columns at once
+        except (ObjectDeletedError, StaleDataError):
+            # Deleted by another worker while still cached here.
+            metrics.inc("entity_cache_requests_total", entity=entity, result="stale")
+            for k in _keys(model, cached):
+                _cache.discard(k)
+            db.expunge(instance)
+            return None
+    return instance
+
+
+def get_user(db: Session, user_id: int, all_tenants: bool = False) -> Optional[User]:
+    return _lookup(db, User, "id", user_id, all_tenants)
+
+
+def get_user_by_email(db: Session, email: str, all_tenants: bool = False) -> Optional[User]:
+    return _lookup(db, User, "email", email, all_tenants)
+
+
+def get_company(db: Session, company_id: int) -> Optional[Company]:
+    return _lookup(db, Company, "id", company_id, all_tenants=True)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_rows(session, flush_context):
+    pending = session.info.setdefault(_PENDING, set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        model = type(obj)
+        if model not in _LOOKUP_FIELDS:
+            continue
+        state = inspect(obj)
+        for field in _LOOKUP_FIELDS[model]:
+            history = state.attrs[field].history
+            for value in itertools.chain(history.added, history.unchanged, history.deleted):
+                pending.add((_entity(model), field, value))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(execute_state):
+    if not (execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.execution_options.get("skip_cache_invalidation", False):
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _LOOKUP_FIELDS:
+        execute_state.session.info.setdefault(_PENDING, set()).add((_entity(mapper.class_), "*", None))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    for entity, field, value in pending:
+        if field == "*":
+            _cache.clear_entity(entity)
+        else:
+            _cache.discard((entity, field, value))
+        metrics.inc("entity_cache_invalidations_total", entity=entity)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop(_PENDING, None)
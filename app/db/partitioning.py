@@ -0,0 +1,234 @@
+"""
+Optional Postgres partitioning of the `tasks` table.
+
+Layout once `partition_tasks` has run (migration 0003, TASKS_HASH_PARTITIONS > 0):
+
+    tasks                 PARTITION BY LIST (company_id), PK (company_id, id)
+    ├── tasks_c<id>       one dedicated partition per hot tenant
+    └── tasks_default     DEFAULT partition, PARTITION BY HASH (company_id)
+        ├── tasks_default_p0
+        └── ...
+
+Every query issued through a tenant-bound session carries `company_id`, so
+Postgres prunes to a single partition. Hot tenants are moved out of the hash
+partitions online with:
+
+    python -m app.db.partitioning move-tenant <company_id>
+    python -m app.db.partitioning status
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+PARENT = "tasks"
+DEFAULT_PARTITION = "tasks_default"
+
+# Rows changed this close to the start of the bulk copy are re-copied at cutover,
+# which absorbs clock skew between app servers writing `updated_at`.
+_CUTOVER_SKEW = timedelta(minutes=5)
+
+
+def _index_defs(conn: Connection, table: str) -> list:
+    rows = conn.execute(
+        text(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE tablename = :table AND indexname NOT LIKE '%pkey'"
+        ),
+        {"table": table},
+    )
+    return [(name, definition) for name, definition in rows]
+
+
+def _foreign_keys(conn: Connection, table: str) -> list:
+    rows = conn.execute(
+        text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": table},
+    )
+    return [(name, definition) for name, definition in rows]
+
+
+def _rebuild(conn: Connection, old: str, create_sql: list) -> None:
+    """Swap `tasks` for a new table built by `create_sql`, keeping indexes, FKs and the id sequence."""
+    indexes = _index_defs(conn, PARENT)
+    foreign_keys = _foreign_keys(conn, PARENT)
+    sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{PARENT}', 'id')")).scalar()
+
+    conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {old}"))
+    conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {PARENT}_pkey TO {old}_pkey"))
+    for sql in create_sql:
+        conn.execute(text(sql))
+    conn.execute(text(f"INSERT INTO {PARENT} SELECT * FROM {old}"))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {PARENT}.id"))
+    conn.execute(text(f"DROP TABLE {old} CASCADE"))
+
+    # Definitions were captured before the rename, so they already target `tasks`.
+    for _, definition in indexes:
+        conn.execute(text(definition))
+    for name, definition in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {PARENT} ADD CONSTRAINT {name} {definition}"))
+
+
+def partition_tasks(conn: Connection, hash_partitions: int) -> None:
+    old = f"{PARENT}_unpartitioned"
+    create_sql = [
+        f"CREATE TABLE {PARENT} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY LIST (company_id)",
+        f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (company_id, id)",
+        f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT PARTITION BY HASH (company_id)",
+    ] + [
+        f"CREATE TABLE {DEFAULT_PARTITION}_p{i} PARTITION OF {DEFAULT_PARTITION} "
+        f"FOR VALUES WITH (MODULUS {hash_partitions}, REMAINDER {i})"
+        for i in range(hash_partitions)
+    ]
+    _rebuild(conn, old, create_sql)
+
+
+def unpartition_tasks(conn: Connection) -> None:
+    old = f"{PARENT}_partitioned"
+    create_sql = [
+        f"CREATE TABLE {PARENT} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        f"ALTER TABLE {PARENT} ADD CONSTRAINT {PARENT}_pkey PRIMARY KEY (id)",
+    ]
+    _rebuild(conn, old, create_sql)
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:t AS regclass)"),
+        {"t": PARENT},
+    ).scalar())
+
+
+def move_tenant(engine: Engine, company_id: int, batch_size: int = 5000) -> int:
+    """
+    Move one company's tasks from the hash partitions into a dedicated list partition.
+
+    The bulk copy runs in short batches while traffic continues. Only the final
+    cutover (re-copy rows changed since the copy started, delete them from the
+    default partition, ATTACH) blocks writes to the default partition, and it
+    gives up after `lock_timeout` rather than queueing behind long transactions.
+    """
+    company_id = int(company_id)
+    partition = f"{PARENT}_c{company_id}"
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            raise RuntimeError("tasks is not partitioned; run migration 0003 with TASKS_HASH_PARTITIONS > 0")
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {partition} (LIKE {PARENT} INCLUDING ALL)"))
+        conn.execute(text(
+            f"ALTER TABLE {partition} DROP CONSTRAINT IF EXISTS {partition}_company_check"
+        ))
+        conn.execute(text(
+            f"ALTER TABLE {partition} ADD CONSTRAINT {partition}_company_check "
+            f"CHECK (company_id = {company_id})"
+        ))
+        columns = [
+            row[0] for row in conn.execute(
+                text(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_name = :t ORDER BY ordinal_position"
+                ),
+                {"t": PARENT},
+            )
+        ]
+
+    copy_started = datetime.utcnow() - _CUTOVER_SKEW
+    last_id, copied = 0, 0
+    while True:
+        with engine.begin() as conn:
+            max_id, count = conn.execute(
+                text(
+                    f"WITH moved AS ("
+                    f" INSERT INTO {partition} SELECT * FROM {DEFAULT_PARTITION}"
+                    f" WHERE company_id = :cid AND id > :last_id ORDER BY id LIMIT :batch"
+                    f" ON CONFLICT (company_id, id) DO NOTHING RETURNING id"
+                    f") SELECT max(id), count(*) FROM moved"
+                ),
+                {"cid": company_id, "last_id": last_id, "batch": batch_size},
+            ).one()
+        if not count:
+            break
+        last_id, copied = max_id, copied + count
+
+    assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in ("company_id", "id"))
+    with engine.begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(
+            text(
+                f"INSERT INTO {partition} SELECT * FROM {DEFAULT_PARTITION} "
+                f"WHERE company_id = :cid AND (id > :last_id OR updated_at >= :since) "
+                f"ON CONFLICT (company_id, id) DO UPDATE SET {assignments}"
+            ),
+            {"cid": company_id, "last_id": last_id, "since": copy_started},
+        )
+        conn.execute(
+            text(
+                f"DELETE FROM {partition} p WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {DEFAULT_PARTITION} d WHERE d.company_id = :cid AND d.id = p.id)"
+            ),
+            {"cid": company_id},
+        )
+        conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE company_id = :cid"), {"cid": company_id})
+        conn.execute(text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {partition} FOR VALUES IN ({company_id})"
+        ))
+    return copied
+
+
+def partition_status(engine: Engine, top: int = 10) -> dict:
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return {"partitioned": False}
+        partitions = conn.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            f"WHERE i.inhparent = CAST('{PARENT}' AS regclass) ORDER BY c.relname"
+        )).all()
+        hot = conn.execute(
+            text(
+                f"SELECT company_id, count(*) FROM {DEFAULT_PARTITION} "
+                "GROUP BY company_id ORDER BY count(*) DESC LIMIT :top"
+            ),
+            {"top": top},
+        ).all()
+    return {
+        "partitioned": True,
+        "partitions": [{"name": n, "bound": b, "estimated_rows": r} for n, b, r in partitions],
+        "largest_default_tenants": [{"company_id": c, "rows": n} for c, n in hot],
+    }
+
+
+def main() -> None:
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser(description="Manage tasks table partitions.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    move = sub.add_parser("move-tenant", help="Give a company its own partition (online).")
+    move.add_argument("company_id", type=int)
+    move.add_argument("--batch-size", type=int, default=5000)
+    sub.add_parser("status", help="List partitions and the largest tenants in the default partition.")
+    args = parser.parse_args()
+
+    if args.command == "move-tenant":
+        copied = move_tenant(engine, args.company_id, args.batch_size)
+        print(f"company {args.company_id}: {copied} rows copied, partition attached")
+    else:
+        status = partition_status(engine)
+        if not status["partitioned"]:
+            print("tasks is not partitioned")
+            return
+        for p in status["partitions"]:
+            print(f"{p['name']:<28} {p['bound']:<40} ~{p['estimated_rows']} rows")
+        print("largest tenants in default partition:")
+        for t in status["largest_default_tenants"]:
+            print(f"  company {t['company_id']}: {t['rows']} rows")
+
+
+if __name__ == "__main__":
+    main()
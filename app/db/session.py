@@ -1,12 +1,29 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+
+def _pool_options() -> dict:
+    """Split DB_MAX_CONNECTIONS across WEB_CONCURRENCY worker processes."""
+    if make_url(settings.DATABASE_URL).get_backend_name() != "postgresql":
+        return {}
+    per_worker = max(2, settings.DB_MAX_CONNECTIONS // max(1, settings.WEB_CONCURRENCY))
+    # Half stays open, the rest is overflow that is closed again when idle.
+    pool_size = max(1, per_worker // 2)
+    return {
+        "pool_size": pool_size,
+        "max_overflow": per_worker - pool_size,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=3600,
+    **_pool_options(),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
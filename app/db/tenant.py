@@ -0,0 +1,102 @@
+"""
+Tenant scoping for ORM sessions.
+
+Once a session is bound to a company with `bind_tenant`, every ORM SELECT,
+UPDATE and DELETE touching a `TenantScoped` model gets
+`company_id = <bound company>` added automatically, and new rows get their
+`company_id` filled in on flush. Statements that legitimately need to look
+across tenants (e.g. global email uniqueness) opt out with
+`.execution_options(all_tenants=True)`.
+
+With TENANT_RLS_ENABLED the bound company is also pushed into the Postgres
+setting `app.company_id`, which the row-level security policies installed by
+`install_rls_policies` check.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from app.core.config import settings
+
+TENANT_KEY = "company_id"
+
+RLS_TABLES = ("tasks", "tasks_archive", "task_events", "users", "otp_records")
+
+
+class TenantScoped:
+    """Mixin for models whose rows belong to exactly one company."""
+
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+
+
+def bind_tenant(db: Session, company_id: int) -> None:
+    db.info[TENANT_KEY] = company_id
+    if settings.TENANT_RLS_ENABLED and db.in_transaction():
+        _set_rls_company(db.connection(), company_id)
+
+
+def _set_rls_company(connection, company_id: int) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text("SELECT set_config('app.company_id', :company_id, true)"),
+            {"company_id": str(company_id)},
+        )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _apply_tenant_criteria(execute_state):
+    company_id = execute_state.session.info.get(TENANT_KEY)
+    if company_id is None or execute_state.execution_options.get("all_tenants", False):
+        return
+    if execute_state.is_select and (
+        execute_state.is_column_load or execute_state.is_relationship_load
+    ):
+        # Lazy/deferred loads already inherit the criteria of the parent query.
+        return
+    if execute_state.is_select or execute_state.is_update or execute_state.is_delete:
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                TenantScoped,
+                lambda cls: cls.company_id == company_id,
+                include_aliases=True,
+            )
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant_on_new_rows(session, flush_context, instances):
+    company_id = session.info.get(TENANT_KEY)
+    if company_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TenantScoped) and obj.company_id is None:
+            obj.company_id = company_id
+
+
+@event.listens_for(Session, "after_begin")
+def _push_rls_company(session, transaction, connection):
+    company_id = session.info.get(TENANT_KEY)
+    if settings.TENANT_RLS_ENABLED and company_id is not None:
+        _set_rls_company(connection, company_id)
+
+
+def install_rls_policies(engine: Engine) -> None:
+    """
+    Enable Postgres row-level security on tenant tables.
+
+    The policy is permissive when `app.company_id` is unset, so unauthenticated
+    flows (login, OTP, background jobs) keep working; once a request session is
+    bound to a tenant the database itself refuses rows from other companies.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in RLS_TABLES:
+            conn.execute(text(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY"))
+            conn.execute(text(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY"))
+            conn.execute(text(f"DROP POLICY IF EXISTS tenant_isolation ON {table}"))
+            conn.execute(text(
+                f"CREATE POLICY tenant_isolation ON {table} USING ("
+                "coalesce(current_setting('app.company_id', true), '') = '' "
+                "OR company_id = current_setting('app.company_id', true)::int)"
+            ))
@@ -1,20 +1,23 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from app.core.security import decode_access_token
+from app.db import entity_cache
 from app.db.session import get_db
+from app.db.tenant import bind_tenant
+from app.models.usage import UsageMetric
 from app.models.user import User
+from app.services import metering_service, session_service
 
 bearer_scheme = HTTPBearer()
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
-    token = credentials.credentials
-    payload = decode_access_token(token)
+def get_token_claims(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)) -> dict:
+    """The access token's claims: signature and expiry checked, session not."""
+    payload = decode_access_token(credentials.credentials)
 
     if payload is None:
         raise HTTPException(
@@ -22,18 +25,43 @@ def get_current_user(
             detail="Invalid or expired token",
         )
 
-    user_id: str = payload.get("sub")
-    if user_id is None:
+    if payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token payload missing user id",
         )
+    return payload
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+
+def get_current_user(
+    payload: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db),
+) -> User:
+    # Logging out or revoking a session ends its access tokens too, not just the refresh token.
+    if not session_service.is_session_active(db, payload.get("sid")):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session expired or signed out",
+        )
+
+    user = entity_cache.get_user(db, int(payload["sub"]))
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
 
+    # Everything else this request does through `db` is scoped to the user's company.
+    bind_tenant(db, user.company_id)
+
+    # Counted here; the api_calls quota itself is enforced per router (app/main.py),
+    # so a company over its limit can still sign out and see its usage.
+    metering_service.record(user.company_id, UsageMetric.api_calls)
     return user
+
+
+def get_current_session_id(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+) -> Optional[int]:
+    payload = decode_access_token(credentials.credentials) or {}
+    return payload.get("sid")
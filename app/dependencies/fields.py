@@ -0,0 +1,39 @@
+from typing import Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def sparse_fields(schema: Type[BaseModel]):
+    """
+    `?fields=id,title` → ["id", "title"], validated against the response schema.
+    No parameter → None (full objects). `id` is always included.
+    """
+    allowed = list(schema.model_fields)
+
+    def parse_fields(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {', '.join(allowed)}"
+        ),
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown field(s): {sorted(unknown)}. Allowed: {allowed}",
+            )
+        requested.add("id")
+        # Keep the schema's order so responses are stable regardless of the query string.
+        return [f for f in allowed if f in requested]
+
+    return parse_fields
+
+
+def sparse_response(rows: Iterable) -> JSONResponse:
+    """Serialize column rows directly; the full response_model would reject partial objects."""
+    return JSONResponse(jsonable_encoder([dict(row._mapping) for row in rows]))
@@ -0,0 +1,23 @@
+import hmac
+
+from fastapi import Header, HTTPException, status
+from typing import Optional
+
+from app.core.config import settings
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Operator-only access to /metrics: `Authorization: Bearer <METRICS_TOKEN>`.
+    User tokens are never accepted, since the metrics cover every tenant.
+    Without METRICS_TOKEN the endpoint is disabled (404).
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
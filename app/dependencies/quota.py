@@ -0,0 +1,22 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.dependencies.auth import get_current_user
+from app.models.usage import UsageMetric
+from app.models.user import User
+from app.services import metering_service
+
+
+def require_quota(metric: UsageMetric):
+    """429 once the company has used up its plan's monthly `metric` quota."""
+    def quota_checker(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+    ) -> User:
+        # get_current_user has already counted this request as an API call.
+        amount = 0 if metric == UsageMetric.api_calls else 1
+        metering_service.check_quota(db, current_user.company_id, metric, amount)
+        return current_user
+
+    return quota_checker
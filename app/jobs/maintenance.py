@@ -0,0 +1,173 @@
+"""
+Maintenance jobs. Each job opens its own session, works in small batches and
+stops early once `time.monotonic()` passes the optional `deadline`. They are run
+periodically by app/jobs/scheduler.py, or by hand with:
+
+    python -m app.jobs.maintenance prune-task-events
+"""
+import argparse
+import asyncio
+import inspect
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.services import auth_service, idempotency_service, session_service, task_event_service, task_service
+
+logger = logging.getLogger(__name__)
+
+
+def prune_task_events(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return task_event_service.prune_task_events(
+            db,
+            compact_after_days=settings.TASK_EVENT_COMPACT_AFTER_DAYS,
+            retain_days=settings.TASK_EVENT_RETENTION_DAYS,
+            deadline=deadline,
+        )
+    finally:
+        db.close()
+
+
+def archive_completed_tasks(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return task_service.archive_completed_tasks(
+            db, settings.TASK_ARCHIVE_AFTER_DAYS, deadline=deadline
+        )
+    finally:
+        db.close()
+
+
+def purge_deleted_tasks(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return task_service.purge_deleted_tasks(
+            db, settings.TASK_HARD_DELETE_AFTER_DAYS, deadline=deadline
+        )
+    finally:
+        db.close()
+
+
+def purge_idempotency_keys(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return idempotency_service.purge_expired_keys(db, deadline=deadline)
+    finally:
+        db.close()
+
+
+def purge_otps(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return auth_service.purge_expired_otps(db, deadline=deadline)
+    finally:
+        db.close()
+
+
+def purge_sessions(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return session_service.purge_expired_sessions(db, deadline=deadline)
+    finally:
+        db.close()
+
+
+def cleanup_unverified_companies(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return auth_service.cleanup_unverified_companies(
+            db, settings.UNVERIFIED_ACCOUNT_TTL_HOURS, deadline=deadline
+        )
+    finally:
+        db.close()
+
+
+def recount_open_tasks(deadline: Optional[float] = None) -> int:
+    db = SessionLocal()
+    try:
+        return task_service.recount_open_tasks(db, deadline=deadline)
+    finally:
+        db.close()
+
+
+def refresh_table_stats(deadline: Optional[float] = None) -> int:
+    """Refresh planner statistics on the busiest tables (Postgres only)."""
+    if engine.dialect.name != "postgresql":
+        return 0
+    tables = ("tasks", "task_events", "otp_records", "users")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in tables:
+            conn.execute(text(f"ANALYZE {table}"))
+    return len(tables)
+
+
+async def send_due_date_reminders(deadline: Optional[float] = None) -> int:
+    from app.core.email import send_task_reminder_email
+
+    db = SessionLocal()
+    sent = 0
+    try:
+        while True:
+            due = await run_in_threadpool(
+                task_service.get_due_reminders, db, settings.TASK_REMINDER_LEAD_HOURS
+            )
+            if not due:
+                break
+            reminded = []
+            for task, assignee in due:
+                try:
+                    await send_task_reminder_email(
+                        email_to=assignee.email,
+                        name=assignee.name,
+                        task_title=task.title,
+                        due_date=task.due_date.strftime("%Y-%m-%d %H:%M"),
+                    )
+                except Exception:
+                    logger.exception("Reminder for task %s failed; will retry next run", task.id)
+                    continue
+                reminded.append(task)
+                if deadline and time.monotonic() >= deadline:
+                    break
+            await run_in_threadpool(task_service.mark_reminders_sent, db, reminded)
+            sent += len(reminded)
+            if not reminded or (deadline and time.monotonic() >= deadline):
+                break
+    finally:
+        db.close()
+    return sent
+
+
+JOBS = {
+    "prune-task-events": prune_task_events,
+    "archive-completed-tasks": archive_completed_tasks,
+    "purge-deleted-tasks": purge_deleted_tasks,
+    "purge-idempotency-keys": purge_idempotency_keys,
+    "purge-otps": purge_otps,
+    "purge-sessions": purge_sessions,
+    "cleanup-unverified-companies": cleanup_unverified_companies,
+    "recount-open-tasks": recount_open_tasks,
+    "refresh-table-stats": refresh_table_stats,
+    "send-due-date-reminders": send_due_date_reminders,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a Voltask maintenance job once.")
+    parser.add_argument("job", choices=sorted(JOBS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    job = JOBS[args.job]
+    processed = asyncio.run(job()) if inspect.iscoroutinefunction(job) else job()
+    logger.info("%s: %d rows processed", args.job, processed)
+
+
+if __name__ == "__main__":
+    main()
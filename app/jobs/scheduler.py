@@ -0,0 +1,152 @@
+"""
+In-process periodic job runner.
+
+Every worker runs a scheduler loop, but only the one holding a Postgres
+advisory lock executes jobs, so each job runs once per cluster. The leader
+keeps the connection that holds the lock; the others borrow a connection for
+each attempt and return it straight away. If the leader dies its connection
+drops, the lock is freed and another worker picks it up on its next tick. On other databases (local
+SQLite) every process considers itself leader.
+
+Each tick runs the jobs that are due, sharing a time budget of
+SCHEDULER_TICK_BUDGET_SECONDS; jobs work in batches and stop at the deadline,
+so a large backlog is worked off over several ticks. Timings and row counts are
+recorded in app.core.metrics.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.jobs import maintenance
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary but fixed: pg advisory lock id shared by every worker ("volt").
+LEADER_LOCK_ID = 0x766F6C74
+
+# Job name -> interval in seconds.
+SCHEDULE = {
+    "purge-otps": 10 * 60,
+    "purge-idempotency-keys": 30 * 60,
+    "purge-sessions": 60 * 60,
+    "send-due-date-reminders": 5 * 60,
+    "cleanup-unverified-companies": 60 * 60,
+    "purge-deleted-tasks": 60 * 60,
+    "archive-completed-tasks": 6 * 60 * 60,
+    "prune-task-events": 24 * 60 * 60,
+    "recount-open-tasks": 24 * 60 * 60,
+    "refresh-table-stats": 24 * 60 * 60,
+}
+
+
+class LeaderLock:
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._conn: Optional[Connection] = None
+        self._held = False
+
+    def acquire(self) -> bool:
+        """Try to become (or confirm we still are) the leader. Blocking; call from a thread."""
+        if self._engine.dialect.name != "postgresql":
+            return True
+        try:
+            if self._held:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            self._conn = self._engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            self._held = bool(self._conn.execute(
+                text("SELECT pg_try_advisory_lock(:id)"), {"id": LEADER_LOCK_ID}
+            ).scalar())
+        except Exception:
+            logger.warning("Lost scheduler leader connection", exc_info=True)
+            self.release()
+            return False
+        if not self._held:
+            # Only the leader keeps a pool connection checked out.
+            self.release()
+        return self._held
+
+    def release(self) -> None:
+        if self._conn is not None:
+            try:
+                if self._held:
+                    self._conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": LEADER_LOCK_ID})
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+        self._held = False
+
+
+class Scheduler:
+    def __init__(self, engine: Engine):
+        self._lock = LeaderLock(engine)
+        self._next_run: Dict[str, float] = {name: 0.0 for name in SCHEDULE}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Let the current job finish, then release leadership."""
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+        await run_in_threadpool(self._lock.release)
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                is_leader = await run_in_threadpool(self._lock.acquire)
+                metrics.set("scheduler_is_leader", 1 if is_leader else 0)
+                if is_leader:
+                    await self.tick()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.SCHEDULER_TICK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def tick(self) -> None:
+        tick_started = time.monotonic()
+        deadline = tick_started + settings.SCHEDULER_TICK_BUDGET_SECONDS
+        for name, interval in SCHEDULE.items():
+            now = time.monotonic()
+            if now >= deadline or self._stopping.is_set():
+                break
+            if now < self._next_run[name]:
+                continue
+            self._next_run[name] = now + interval
+            await self._run_job(name, deadline)
+        metrics.observe("scheduler_tick_seconds", time.monotonic() - tick_started)
+
+    async def _run_job(self, name: str, deadline: float) -> None:
+        job = maintenance.JOBS[name]
+        started = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(job):
+                processed = await job(deadline=deadline)
+            else:
+                processed = await run_in_threadpool(job, deadline=deadline)
+        except Exception:
+            metrics.inc("scheduler_job_failures_total", job=name)
+            logger.exception("Scheduled job %s failed", name)
+            return
+        finally:
+            metrics.observe("scheduler_job_seconds", time.monotonic() - started, job=name)
+        metrics.inc("scheduler_job_rows_total", processed, job=name)
+        if time.monotonic() >= deadline:
+            # Stopped on the budget, so there is probably backlog left: continue next tick.
+            self._next_run[name] = 0.0
+        if processed:
+            logger.info("%s: %d rows processed", name, processed)
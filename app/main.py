@@ -1,9 +1,24 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
 from app.db.session import engine
 from app.db.base import Base
-from app.models import company, user, task, otp
-from app.routers import auth, users, tasks
+from app.db.tenant import install_rls_policies
+from app.core.config import settings
+from app.core.email import drain_email_sends
+from app.core.metrics import metrics
+from app.dependencies.metrics import require_metrics_token
+from app.dependencies.quota import require_quota
+from app.jobs.scheduler import Scheduler
+from app.middleware.compression import CompressionMiddleware
+from app.middleware import profiling
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.models import company, user, task, otp, session, task_event, idempotency, usage
+from app.models.usage import UsageMetric
+from app.routers import admin, auth, companies, reports, users, tasks
+from app.services import metering_service
 
 app = FastAPI(
     title="Voltask API",
@@ -11,6 +26,15 @@ app = FastAPI(
     version="1.0.0",
 )
 
+if settings.PROFILING_ENABLED:
+    # Innermost, so a profile covers routing, dependencies and the endpoint.
+    profiling.install()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Added first so it sits inside CORS: replayed responses still get CORS headers.
+app.add_middleware(IdempotencyMiddleware)
+# Outside idempotency so stored responses stay uncompressed and are replayed per client.
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],       # change to your frontend URL in production
@@ -21,14 +45,72 @@ app.add_middleware(
 
 @app.on_event("startup")
 def startup():
-    Base.metadata.create_all(bind=engine)
+    if settings.DEV_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
+    if settings.TENANT_RLS_ENABLED:
+        install_rls_policies(engine)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    metering_service.start_flusher()
+    if settings.SCHEDULER_ENABLED:
+        app.state.scheduler = Scheduler(engine)
+        app.state.scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Runs once in-flight requests are done (or GRACEFUL_TIMEOUT has passed).
+    scheduler = getattr(app.state, "scheduler", None)
+    if scheduler is not None:
+        await scheduler.stop()
+    await metering_service.stop_flusher()
+    await drain_email_sends(settings.EMAIL_DRAIN_SECONDS)
 
 
+# The api_calls quota applies to the product API. Auth (logout, password changes),
+# usage and admin routes stay reachable over quota so a company can see why.
+metered = [Depends(require_quota(UsageMetric.api_calls))]
 app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(tasks.router)
+app.include_router(users.router, dependencies=metered)
+app.include_router(tasks.router, dependencies=metered)
+app.include_router(companies.router)
+app.include_router(reports.router, dependencies=metered)
+app.include_router(admin.router)
 
 
 @app.get("/", tags=["Health"])
 def health_check():
     return {"status": "ok", "service": "Voltask API"}
+
+
+@app.get("/ready", tags=["Health"])
+def readiness_check():
+    """Readiness probe: fails while the DB pool is exhausted or the database is unreachable."""
+    pool = engine.pool
+    if isinstance(pool, QueuePool) and pool.checkedout() >= pool.size() + pool._max_overflow:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "reason": "database pool exhausted", "pool": pool.status()},
+        )
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "reason": "database unreachable"},
+        )
+    return {"status": "ready", "pool": pool.status()}
+
+
+@app.get(
+    "/metrics",
+    tags=["Health"],
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+def get_metrics():
+    return metrics.render()
@@ -0,0 +1,135 @@
+"""
+Response compression negotiated from `Accept-Encoding`.
+
+Brotli is used when the client accepts it and the optional `brotli` package is
+installed, gzip otherwise. Bodies smaller than COMPRESSION_MINIMUM_SIZE and
+responses that already carry a Content-Encoding are passed through untouched.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+def _accepted(header: str) -> set:
+    accepted = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.partition(";")
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                if float(value) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+            self._compress, self._finish = self._obj.process, self._obj.finish
+        else:
+            # wbits=31 writes a gzip header and trailer.
+            self._obj = zlib.compressobj(settings.GZIP_COMPRESS_LEVEL, zlib.DEFLATED, 31)
+            self._compress, self._finish = self._obj.compress, self._obj.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = (
+            settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message = {}
+        buffered = b""
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, buffered, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until enough of the body is seen to decide whether to compress.
+                start = message
+                passthrough = "content-encoding" in Headers(raw=message["headers"])
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if passthrough:
+                if start:
+                    await send(start)
+                    start = {}
+                await send(message)
+                return
+
+            if compressor is None:
+                # Responses passed through BaseHTTPMiddleware arrive in chunks, so
+                # buffer up to minimum_size before deciding.
+                buffered += body
+                if more_body and len(buffered) < self.minimum_size:
+                    return
+                if not more_body and len(buffered) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": buffered})
+                    return
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                del headers["Content-Length"]
+                data = compressor.compress(buffered)
+                buffered = b""
+                if not more_body:
+                    data += compressor.finish()
+                    headers["Content-Length"] = str(len(data))
+                await send(start)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
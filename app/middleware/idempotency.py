@@ -0,0 +1,165 @@
+"""
+`Idempotency-Key` support for retried write requests.
+
+The first request with a given key runs normally and its response is stored.
+Retries with the same key and body get the stored response back without
+reaching the router. A retry that arrives while the first request is still
+running waits for it (up to IDEMPOTENCY_WAIT_SECONDS) instead of running twice.
+The running request holds the key on a short lease (IDEMPOTENCY_LEASE_SECONDS)
+that it keeps extending. If its worker dies, the next retry after the lease
+runs out executes the request instead of getting 409 until the key expires.
+Server errors and transient refusals (409, 429) are not stored, so the client
+can retry them.
+"""
+import asyncio
+import hashlib
+import uuid
+from typing import Dict
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.session import SessionLocal
+from app.services import idempotency_service
+
+HEADER = "Idempotency-Key"
+IDEMPOTENT_ROUTES = {
+    ("POST", "/tasks/"),
+    ("POST", "/users/invite"),
+    ("POST", "/auth/register"),
+}
+# Refusals that a retry can get past; storing them would replay the refusal.
+_TRANSIENT_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+_POLL_INTERVAL = 0.1
+
+
+def _principal(request: Request) -> str:
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = decode_access_token(auth[7:]) or {}
+        if payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return "anonymous"
+
+
+def _with_db(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        # Requests in flight in this worker, so local duplicates wake up without polling.
+        self._local: Dict[str, asyncio.Event] = {}
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        key = request.headers.get(HEADER)
+        if not key or (request.method, request.url.path) not in IDEMPOTENT_ROUTES:
+            return await call_next(request)
+        if len(key) > 255:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": f"{HEADER} must be at most 255 characters"},
+            )
+
+        scope_hash = hashlib.sha256(
+            f"{_principal(request)}\n{request.method}\n{request.url.path}\n{key}".encode()
+        ).hexdigest()
+        # The query string is part of the request (e.g. POST /tasks/?assign=auto).
+        request_hash = hashlib.sha256(
+            request.url.query.encode() + b"\n" + await request.body()
+        ).hexdigest()
+
+        lease_id = uuid.uuid4().hex
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            outcome, record = await run_in_threadpool(
+                _with_db, idempotency_service.claim, scope_hash, request_hash, lease_id
+            )
+            if outcome == idempotency_service.CLAIMED:
+                return await self._execute(request, call_next, scope_hash, lease_id)
+            if outcome == idempotency_service.COMPLETED:
+                return self._replay(record)
+            if outcome == idempotency_service.MISMATCH:
+                return JSONResponse(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    content={"detail": f"{HEADER} was already used with a different request body"},
+                )
+            if loop.time() >= deadline:
+                return JSONResponse(
+                    status_code=status.HTTP_409_CONFLICT,
+                    content={"detail": f"A request with this {HEADER} is still being processed"},
+                )
+            await self._wait(scope_hash, deadline - loop.time())
+
+    async def _wait(self, scope_hash: str, timeout: float) -> None:
+        event = self._local.get(scope_hash)
+        try:
+            if event is not None:
+                await asyncio.wait_for(event.wait(), timeout)
+            else:
+                await asyncio.sleep(min(_POLL_INTERVAL, max(timeout, 0)))
+        except asyncio.TimeoutError:
+            pass
+
+    @staticmethod
+    async def _keep_lease(scope_hash: str, lease_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+            if not await run_in_threadpool(_with_db, idempotency_service.extend, scope_hash, lease_id):
+                return
+
+    async def _execute(self, request: Request, call_next, scope_hash: str, lease_id: str) -> Response:
+        event = self._local[scope_hash] = asyncio.Event()
+        heartbeat = asyncio.ensure_future(self._keep_lease(scope_hash, lease_id))
+        try:
+            try:
+                response = await call_next(request)
+                body = b"".join([chunk async for chunk in response.body_iterator])
+            except Exception:
+                await run_in_threadpool(_with_db, idempotency_service.release, scope_hash, lease_id)
+                raise
+            finally:
+                heartbeat.cancel()
+
+            if response.status_code >= 500 or response.status_code in _TRANSIENT_STATUSES:
+                await run_in_threadpool(_with_db, idempotency_service.release, scope_hash, lease_id)
+            else:
+                await run_in_threadpool(
+                    _with_db,
+                    idempotency_service.complete,
+                    scope_hash,
+                    lease_id,
+                    response.status_code,
+                    response.headers.get("content-type"),
+                    body,
+                )
+            return Response(
+                content=body,
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                background=response.background,
+            )
+        finally:
+            event.set()
+            self._local.pop(scope_hash, None)
+
+    @staticmethod
+    def _replay(record) -> Response:
+        return Response(
+            content=record.response_body or b"",
+            status_code=record.status_code,
+            media_type=record.content_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
@@ -0,0 +1,262 @@
+"""
+Opt-in per-request profiling.
+
+Only installed when PROFILING_ENABLED is set, so it costs nothing otherwise.
+A request is profiled when an admin sends `X-Profile: 1` or it is picked by
+PROFILING_SAMPLE_RATE. Its cProfile stats and, with PROFILING_TRACEMALLOC,
+allocation growth are kept in a ring buffer of the last PROFILING_BUFFER_SIZE
+profiles, served by GET /admin/profiles.
+
+Sync endpoints, dependencies and response validation run in the threadpool.
+Before Python 3.12 a cProfile only sees its own thread, so install() wraps
+FastAPI's run_in_threadpool: for a profiled request each threadpool call gets
+its own cProfile, merged into the request's stats afterwards.
+From 3.12 cProfile runs on sys.monitoring: one profiler sees every thread and
+a second one cannot be enabled, so the event-loop profiler is the only one.
+Event-loop time includes other requests' coroutines that ran on the loop
+meanwhile (on 3.12+ also their threadpool work); the per-thread part is exact.
+"""
+import cProfile
+import functools
+import io
+import itertools
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+
+HEADER = "x-profile"
+_TOP_FUNCTIONS = 40
+_TOP_ALLOCATIONS = 15
+
+# The profiler's own bookkeeping, left out of allocation reports.
+_OWN_FRAMES = [
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+]
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_profiles: deque = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+_current: ContextVar[Optional["_RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# Python 3.12+: cProfile is process-wide and only one can be enabled at a time.
+_PROCESS_WIDE = hasattr(sys, "monitoring")
+
+_loop_profiler_busy = False
+_tracemalloc_users = 0
+
+
+class _RequestProfile:
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def add(self, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+
+def _profiled(profile: _RequestProfile, func):
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.disable()
+            profile.add(profiler)
+
+    return run
+
+
+def _wrap_run_in_threadpool(original):
+    async def run_in_threadpool(func, *args, **kwargs):
+        profile = _current.get()
+        if profile is not None:
+            func = _profiled(profile, func)
+        return await original(func, *args, **kwargs)
+
+    return run_in_threadpool
+
+
+def install() -> None:
+    """Route FastAPI's threadpool calls through the per-request profiler."""
+    if _PROCESS_WIDE:
+        return  # the event-loop profiler already sees the threadpool
+    import fastapi.concurrency
+    import fastapi.dependencies.utils
+    import fastapi.routing
+
+    for module in (fastapi.routing, fastapi.dependencies.utils, fastapi.concurrency):
+        module.run_in_threadpool = _wrap_run_in_threadpool(module.run_in_threadpool)
+
+
+def _top_functions(stats: Optional[pstats.Stats]) -> List[dict]:
+    if stats is None:
+        return []
+    rows = []
+    for (filename, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": ncalls,
+            "self_ms": round(tottime * 1000, 3),
+            "total_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows[:_TOP_FUNCTIONS]
+
+
+def _render(stats: Optional[pstats.Stats]) -> str:
+    if stats is None:
+        return ""
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(_TOP_FUNCTIONS)
+    return out.getvalue()
+
+
+def _trigger(scope: Scope) -> Optional[tuple]:
+    """(trigger, principal) when this request should be profiled."""
+    headers = Headers(scope=scope)
+    requested = headers.get(HEADER) == "1"
+    sampled = bool(settings.PROFILING_SAMPLE_RATE) and random.random() < settings.PROFILING_SAMPLE_RATE
+    if not (requested or sampled):
+        return None  # the common case: no token decoding
+
+    payload = {}
+    auth = headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = decode_access_token(auth[7:]) or {}
+    principal = (payload.get("company_id"), payload.get("sub"))
+
+    if requested and payload.get("role") == "admin":
+        return "header", principal
+    if sampled:
+        return "sample", principal
+    return None
+
+
+def list_profiles(company_id: int) -> List[dict]:
+    with _lock:
+        return [p for p in reversed(_profiles) if p["company_id"] == company_id]
+
+
+def get_profile(company_id: int, profile_id: int) -> Optional[dict]:
+    with _lock:
+        for p in _profiles:
+            if p["id"] == profile_id and p["company_id"] == company_id:
+                return p
+    return None
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _loop_profiler_busy, _tracemalloc_users
+        trigger = _trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        profile = _RequestProfile()
+        token = _current.set(profile)
+
+        # One cProfile per thread (per process on 3.12+): only the first of overlapping
+        # requests profiles the loop.
+        loop_profiler = None
+        if not _loop_profiler_busy:
+            _loop_profiler_busy = True
+            loop_profiler = cProfile.Profile()
+
+        snapshot_before = None
+        if settings.PROFILING_TRACEMALLOC:
+            if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            _tracemalloc_users += 1
+            tracemalloc.reset_peak()
+            snapshot_before = tracemalloc.take_snapshot()
+
+        if loop_profiler is not None:
+            try:
+                loop_profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this process (Python 3.12+).
+                loop_profiler = None
+                _loop_profiler_busy = False
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if loop_profiler is not None:
+                loop_profiler.disable()
+                profile.add(loop_profiler)
+                _loop_profiler_busy = False
+            duration = time.perf_counter() - started
+            _current.reset(token)
+
+            memory = None
+            if snapshot_before is not None:
+                snapshot_after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                _tracemalloc_users -= 1
+                if _tracemalloc_users == 0:
+                    tracemalloc.stop()
+                diffs = snapshot_after.filter_traces(_OWN_FRAMES).compare_to(
+                    snapshot_before.filter_traces(_OWN_FRAMES), "lineno"
+                )
+                memory = {
+                    "peak_kb": round(peak / 1024, 1),
+                    "top_allocations": [
+                        {"location": str(diff.traceback), "size_kb": round(diff.size_diff / 1024, 1), "count": diff.count_diff}
+                        for diff in diffs[:_TOP_ALLOCATIONS]
+                    ],
+                }
+
+            company_id, user_id = trigger[1]
+            with _lock:
+                _profiles.append({
+                    "id": next(_ids),
+                    "created_at": datetime.utcnow(),
+                    "trigger": trigger[0],
+                    "company_id": company_id,
+                    "user_id": int(user_id) if user_id else None,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status_code": status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                    "loop_profiled": loop_profiler is not None,
+                    "functions": _top_functions(profile.stats),
+                    "report": _render(profile.stats),
+                    "memory": memory,
+                })
@@ -11,6 +11,8 @@ class Company(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
+    # Plan name, see PLAN_LIMITS in app/services/metering_service.py
+    plan = Column(String(20), nullable=False, default="free")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     users = relationship("User", back_populates="company")
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String
+
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored outcome of a write request sent with an `Idempotency-Key` header.
+    `status_code` is NULL while the first request is still being processed; that
+    claim is held by `lease_id` until `locked_until`, which the running request
+    keeps extending. A claim whose lease ran out (its worker died) can be taken over.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    # sha256(principal, method, path, client key) — fixed width regardless of the client's key.
+    scope_hash = Column(String(64), unique=True, index=True, nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String(100), nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    lease_id = Column(String(32), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
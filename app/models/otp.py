@@ -1,14 +1,18 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
+from app.db.tenant import TenantScoped
 
 
-class OTPRecord(Base):
+class OTPRecord(TenantScoped, Base):
 
     __tablename__ = "otp_records"
+    __table_args__ = (
+        Index("ix_otp_records_company_user_purpose", "company_id", "user_id", "purpose", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
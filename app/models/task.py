@@ -1,9 +1,10 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, SmallInteger, String, Text, text
+from sqlalchemy.orm import declared_attr, relationship
 
 from app.db.base import Base
+from app.db.tenant import TenantScoped
 import enum
 
 
@@ -13,19 +14,104 @@ class TaskStatus(str, enum.Enum):
     completed = "completed"
 
 
-class Task(Base):
+class TaskPriority(enum.IntEnum):
+    low = 0
+    normal = 1
+    high = 2
+    urgent = 3
+
+
+class Task(TenantScoped, Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Soft-deleted rows stay out of the index every list query uses.
+        Index(
+            "ix_tasks_company_live",
+            "company_id",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_tasks_company_assignee", "company_id", "assigned_to"),
+        # Range scans for GET /reports/tasks.
+        Index("ix_tasks_company_created", "company_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     status = Column(Enum(TaskStatus), default=TaskStatus.pending, nullable=False)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    priority = Column(SmallInteger, default=TaskPriority.normal, nullable=False)
+    due_date = Column(DateTime, nullable=True)
+    reminder_sent_at = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)
+    # Bumped on every ORM update; see __mapper_args__ and If-Match on PATCH /tasks/{id}.
+    version = Column(Integer, nullable=False)
 
     company = relationship("Company", back_populates="tasks")
     creator = relationship("User", foreign_keys=[created_by], back_populates="created_tasks")
     assignee = relationship("User", foreign_keys=[assigned_to], back_populates="assigned_tasks")
+
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        # Identify rows by (company_id, id) so flush-time UPDATE/DELETE statements
+        # carry the partition key and prune to one partition. version_id_col turns
+        # each flush into a compare-and-set on `version` (StaleDataError on a lost race).
+        return {
+            "primary_key": [cls.__table__.c.company_id, cls.__table__.c.id],
+            "version_id_col": cls.__table__.c.version,
+        }
+
+
+# "My queue": open tasks of one assignee in display order. GET /tasks/queue selects
+# only key and INCLUDE columns, so Postgres answers it with an index-only range scan
+# that never touches completed or deleted rows. `id` is the final tie-breaker.
+Index(
+    "ix_tasks_queue",
+    Task.assigned_to,
+    Task.priority.desc(),
+    Task.due_date,  # ascending B-tree order already sorts NULLs last on Postgres
+    Task.id,
+    postgresql_where=text("status != 'completed' AND deleted_at IS NULL"),
+    sqlite_where=text("status != 'completed' AND deleted_at IS NULL"),
+    postgresql_include=["company_id", "title", "status"],
+)
+
+# Tasks still waiting for their due-date reminder, scanned by the scheduler.
+Index(
+    "ix_tasks_reminder_due",
+    Task.due_date,
+    postgresql_where=text(
+        "reminder_sent_at IS NULL AND status != 'completed' AND deleted_at IS NULL"
+    ),
+    sqlite_where=text(
+        "reminder_sent_at IS NULL AND status != 'completed' AND deleted_at IS NULL"
+    ),
+)
+
+
+class TaskArchive(TenantScoped, Base):
+    """Cold storage for completed tasks moved out of `tasks` by the archiver."""
+
+    __tablename__ = "tasks_archive"
+    __table_args__ = (
+        Index("ix_tasks_archive_company_id", "company_id", "id"),
+        Index("ix_tasks_archive_company_created", "company_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    status = Column(Enum(TaskStatus), nullable=False)
+    priority = Column(SmallInteger, nullable=False)
+    due_date = Column(DateTime, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    version = Column(Integer, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Enum, ForeignKey, Index, Integer, String
+
+from app.db.base import Base
+from app.db.tenant import TenantScoped
+import enum
+
+
+class TaskEventType(str, enum.Enum):
+    created = "created"
+    updated = "updated"
+    status_changed = "status_changed"
+    assigned = "assigned"
+    deleted = "deleted"
+
+
+class TaskEvent(TenantScoped, Base):
+    """Append-only task history. Rows are only ever inserted or pruned, never updated."""
+
+    __tablename__ = "task_events"
+    __table_args__ = (
+        Index("ix_task_events_company_created", "company_id", "created_at"),
+        Index("ix_task_events_task_id", "task_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # No FK to tasks: history must outlive the task row.
+    task_id = Column(Integer, nullable=False)
+    actor_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    event_type = Column(Enum(TaskEventType), nullable=False)
+    from_value = Column(String(50), nullable=True)
+    to_value = Column(String(50), nullable=True)
+    changes = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, Date, ForeignKey, Integer, PrimaryKeyConstraint, String
+
+from app.db.base import Base
+import enum
+
+
+class UsageMetric(str, enum.Enum):
+    api_calls = "api_calls"
+    tasks_created = "tasks_created"
+    users_invited = "users_invited"
+
+
+class CompanyUsage(Base):
+    """
+    Monthly usage totals per company and metric. Written only by the metering
+    flusher (app/services/metering_service.py) as `value = value + delta` upserts.
+    """
+
+    __tablename__ = "company_usage"
+    __table_args__ = (
+        PrimaryKeyConstraint("company_id", "period", "metric"),
+    )
+
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    period = Column(Date, nullable=False)  # first day of the month (UTC)
+    metric = Column(String(30), nullable=False)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -1,9 +1,10 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Enum, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
+from app.db.tenant import TenantScoped
 import enum
 
 
@@ -13,20 +14,27 @@ class UserRole(str, enum.Enum):
     employee = "employee"
 
 
-class User(Base):
+class User(TenantScoped, Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_company_role", "company_id", "role"),
+        # Least-loaded pick for auto-assignment: one index seek per role.
+        Index("ix_users_workload", "company_id", "is_active", "role", "open_task_count", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     role = Column(Enum(UserRole), nullable=False, default=UserRole.employee)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     is_active = Column(Boolean, default=True)
     must_change_password = Column(Boolean, default=False)
+    # Assigned, not completed, not deleted. Maintained by task_service.
+    open_task_count = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     company = relationship("Company", back_populates="users")
     created_tasks = relationship("Task", foreign_keys="Task.created_by", back_populates="creator")
     assigned_tasks = relationship("Task", foreign_keys="Task.assigned_to", back_populates="assignee")
     otp_records = relationship("OTPRecord", back_populates="user")
+    sessions = relationship("UserSession", back_populates="user")
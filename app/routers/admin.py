@@ -0,0 +1,33 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.dependencies.role import require_roles
+from app.middleware import profiling
+from app.models.user import User, UserRole
+from app.schemas.profile import ProfileDetail, ProfileSummary
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+def list_profiles(
+    current_user: User = Depends(require_roles(UserRole.admin)),
+):
+    """
+    Recent request profiles for your company, newest first.
+    Requires PROFILING_ENABLED; profile a request by sending `X-Profile: 1` as an admin.
+    """
+    return profiling.list_profiles(current_user.company_id)
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileDetail)
+def get_profile(
+    profile_id: int,
+    current_user: User = Depends(require_roles(UserRole.admin)),
+):
+    """cProfile stats (top functions by cumulative time) and allocation growth for one request."""
+    profile = profiling.get_profile(current_user.company_id, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
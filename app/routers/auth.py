@@ -1,16 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app.db import entity_cache
 from app.db.session import get_db
-from app.dependencies.auth import get_current_user
+from app.dependencies.auth import get_current_session_id, get_current_user, get_token_claims
 from app.models.user import User
 from app.schemas.auth import (
     ChangePasswordRequest,
     ForgotPasswordRequest,
     LoginRequest,
+    RefreshRequest,
     RegisterRequest,
     RegisterResponse,
     ResetPasswordRequest,
+    SessionResponse,
     TokenResponse,
     UserMeResponse,
     VerifyEmailRequest,
@@ -18,14 +23,14 @@ from app.schemas.auth import (
     VerifyOTPRequest,
     VerifyOTPResponse,
 )
-from app.services import auth_service
+from app.services import auth_service, session_service
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
 async def register(data: RegisterRequest, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == data.email).first()
+    existing = entity_cache.get_user_by_email(db, data.email)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     await auth_service.register_company_and_admin(db, data)
@@ -45,8 +50,14 @@ async def login(data: LoginRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/verify-login", response_model=TokenResponse)
-def verify_login(data: VerifyLoginRequest, db: Session = Depends(get_db)):
-    return auth_service.verify_login_otp(db, data.email, data.otp)
+def verify_login(data: VerifyLoginRequest, request: Request, db: Session = Depends(get_db)):
+    return auth_service.verify_login_otp(db, data.email, data.otp, request.headers.get("user-agent"))
+
+
+@router.post("/refresh", response_model=TokenResponse)
+def refresh(data: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token. The refresh token is rotated."""
+    return session_service.refresh_session(db, data.refresh_token)
 
 
 @router.post("/forgot-password")
@@ -77,6 +88,45 @@ def change_password(
     data: ChangePasswordRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    current_session_id: Optional[int] = Depends(get_current_session_id),
 ):
-    auth_service.change_password(db, current_user, data.old_password, data.new_password)
+    """Change the password and sign out all other devices."""
+    auth_service.change_password(
+        db, current_user, data.old_password, data.new_password, current_session_id
+    )
     return {"message": "Password changed successfully."}
+
+
+@router.get("/sessions", response_model=List[SessionResponse])
+def list_sessions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_session_id: Optional[int] = Depends(get_current_session_id),
+):
+    sessions = session_service.list_sessions(db, current_user)
+    return [
+        SessionResponse.model_validate(s).model_copy(update={"current": s.id == current_session_id})
+        for s in sessions
+    ]
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+def revoke_session(
+    session_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    session_service.revoke_session(db, current_user.id, session_id)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    db: Session = Depends(get_db),
+    claims: dict = Depends(get_token_claims),
+):
+    """
+    End the calling device's session: its refresh token and access tokens stop
+    working. Logging out twice is not an error.
+    """
+    if claims.get("sid") is not None:
+        session_service.revoke_session(db, int(claims["sub"]), claims["sid"], missing_ok=True)
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.dependencies.role import require_roles
+from app.models.user import User, UserRole
+from app.schemas.company import CompanyUsageResponse
+from app.services import metering_service
+
+router = APIRouter(prefix="/companies", tags=["Companies"])
+
+
+@router.get("/me/usage", response_model=CompanyUsageResponse)
+def get_my_usage(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    """
+    This month's usage against the company's plan limits.
+    Counts from other API workers can lag by up to METERING_FLUSH_SECONDS.
+    """
+    plan, period, usage = metering_service.get_usage(db, current_user.company_id)
+    limits = metering_service.PLAN_LIMITS.get(plan, metering_service.PLAN_LIMITS["free"])
+    return {
+        "company_id": current_user.company_id,
+        "plan": plan,
+        "period": period,
+        "usage": {
+            metric.value: {"used": usage[metric.value], "limit": limits.get(metric)}
+            for metric in limits
+        },
+    }
@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.dependencies.role import require_roles
+from app.models.user import User, UserRole
+from app.schemas.report import ReportBucket, TaskReport
+from app.services import report_service
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+
+@router.get("/tasks", response_model=TaskReport)
+def task_report(
+    bucket: ReportBucket = Query(ReportBucket.week),
+    since: Optional[datetime] = Query(None, description="Start of the range (default: 12 weeks before `until`)"),
+    until: Optional[datetime] = Query(None, description="End of the range, exclusive (default: now)"),
+    assigned_to: Optional[int] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    """
+    Tasks created and completed per period and assignee, with the median hours
+    to complete. Aggregated in the database and cached for REPORT_CACHE_SECONDS.
+    """
+    return report_service.get_task_report(
+        db, current_user.company_id, bucket, since, until, assigned_to
+    )
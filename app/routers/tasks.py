@@ -1,26 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.db.session import get_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.fields import sparse_fields, sparse_response
+from app.dependencies.quota import require_quota
 from app.dependencies.role import require_roles
+from app.models.usage import UsageMetric
 from app.models.user import User, UserRole
 from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate, TaskAssign, TaskResponse
-from app.services import task_service
+from app.schemas.task import (
+    AssignMode, TaskCreate, TaskUpdate, TaskAssign, TaskResponse, TaskEventResponse, TaskQueueItem,
+)
+from app.services import task_event_service, task_service
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
+def _auto_assign_roles(
+    assign: Optional[AssignMode] = None,
+    assign_roles: List[UserRole] = Query([UserRole.employee]),
+) -> Optional[List[UserRole]]:
+    """`assign=auto` → roles to pick the least-loaded active user from."""
+    return assign_roles if assign == AssignMode.auto else None
+
+
+def _if_match(if_match: Optional[str] = Header(None)) -> Optional[List[int]]:
+    """
+    `If-Match: "3"` → [3]; absent or `*` → None (no precondition). If-Match uses
+    strong comparison (RFC 9110 §13.1.1), so weak tags like `W/"3"` never match.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tags = [tag.strip() for tag in if_match.split(",")]
+    try:
+        return [int(tag.strip('"')) for tag in tags if not tag.startswith("W/")]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='If-Match must be a task version ETag, e.g. "3"',
+        )
+
+
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 def create_task(
     data: TaskCreate,
+    auto_assign_roles: Optional[List[UserRole]] = Depends(_auto_assign_roles),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+    _quota: User = Depends(require_quota(UsageMetric.tasks_created)),
 ):
-    """Admin/Manager: Create a new task."""
-    return task_service.create_task(db, data, current_user)
+    """
+    Admin/Manager: Create a new task.
+    `assign=auto` assigns it to the active user with the fewest open tasks
+    among `assign_roles` (default: employee).
+    """
+    return task_service.create_task(db, data, current_user, auto_assign_roles)
 
 
 @router.get("/", response_model=List[TaskResponse])
@@ -28,40 +66,92 @@ def get_tasks(
     skip: int = 0,
     limit: int = 20,
     search: Optional[str] = None,
+    include_archived: bool = False,
+    overdue: bool = False,
+    due_before: Optional[datetime] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(TaskResponse)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Admin/Manager → all company tasks.
     Employee → only tasks assigned to them.
-    Supports pagination and title search.
+    Supports pagination, title search and due-date filters.
+    Archived (long-completed) tasks are only included with `include_archived=true`.
+    `fields=id,title,status` returns only those columns.
     """
-    return task_service.get_tasks(db, current_user, skip=skip, limit=limit, search=search)
+    result = task_service.get_tasks(
+        db,
+        current_user,
+        skip=skip,
+        limit=limit,
+        search=search,
+        include_archived=include_archived,
+        overdue=overdue,
+        due_before=due_before,
+        fields=fields,
+    )
+    return sparse_response(result) if fields else result
+
+
+@router.get("/queue", response_model=List[TaskQueueItem])
+def get_task_queue(
+    limit: int = 50,
+    overdue: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The caller's open tasks, ordered by priority (highest first) then due date."""
+    return task_service.get_task_queue(db, current_user, limit=min(limit, 200), overdue=overdue)
 
 
 @router.patch("/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: int,
     data: TaskUpdate,
+    response: Response,
+    if_match: Optional[List[int]] = Depends(_if_match),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Admin/Manager → update any company task.
     Employee → only their assigned tasks.
+    Send the task's `version` as `If-Match: "<version>"` to get a 409 instead of
+    overwriting someone else's change. The new version is returned as `ETag`.
+    """
+    task = task_service.update_task(db, task_id, data, current_user, if_match)
+    response.headers["ETag"] = f'"{task.version}"'
+    return task
+
+
+@router.get("/{task_id}/history", response_model=List[TaskEventResponse])
+def get_task_history(
+    task_id: int,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Newest-first change log of a task.
+    Pass the smallest `id` of the previous page as `before_id` to page back.
     """
-    return task_service.update_task(db, task_id, data, current_user)
+    return task_event_service.get_task_history(
+        db, task_id, current_user, limit=min(limit, 200), before_id=before_id
+    )
 
 
 @router.patch("/{task_id}/assign", response_model=TaskResponse)
 def assign_task(
     task_id: int,
-    data: TaskAssign,
+    data: Optional[TaskAssign] = None,
+    auto_assign_roles: Optional[List[UserRole]] = Depends(_auto_assign_roles),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
 ):
-    """Admin/Manager: Assign a task to a user."""
-    return task_service.assign_task(db, task_id, data, current_user)
+    """Admin/Manager: Assign a task to a user, or pass `assign=auto` to pick the least-loaded one."""
+    return task_service.assign_task(db, task_id, data, current_user, auto_assign_roles)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -70,5 +160,5 @@ def delete_task(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.admin)),
 ):
-    """Admin-only: Delete a task."""
+    """Admin-only: Delete a task. The row is soft-deleted and purged later in the background."""
     task_service.delete_task(db, task_id, current_user)
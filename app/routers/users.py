@@ -2,15 +2,21 @@ import random
 import string
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.db import entity_cache
 from app.db.session import get_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.fields import sparse_fields, sparse_response
+from app.dependencies.quota import require_quota
 from app.dependencies.role import require_roles
+from app.models.usage import UsageMetric
 from app.models.user import User, UserRole
-from app.schemas.user import InviteUserRequest, UserResponse
+from app.schemas.user import InviteUserRequest, UserResponse, UserWorkload
 from app.core.security import hash_password
+from app.services import metering_service
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -25,8 +31,10 @@ async def invite_user(
     data: InviteUserRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.admin)),
+    _quota: User = Depends(require_quota(UsageMetric.users_invited)),
 ):
-    existing = db.query(User).filter(User.email == data.email).first()
+    # Emails are unique across all companies, so look outside the tenant scope.
+    existing = entity_cache.get_user_by_email(db, data.email, all_tenants=True)
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
@@ -37,12 +45,17 @@ async def invite_user(
         email=data.email,
         password=hash_password(temp_password),
         role=data.role,
-        company_id=current_user.company_id,
         is_active=True,
         must_change_password=True,
     )
     db.add(user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker's cache may not have seen a just-registered email yet.
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    metering_service.record(current_user.company_id, UsageMetric.users_invited)
     db.refresh(user)
 
     from app.core.email import send_invite_email
@@ -59,10 +72,29 @@ async def invite_user(
 
 @router.get("/", response_model=List[UserResponse])
 def get_company_users(
+    fields: Optional[List[str]] = Depends(sparse_fields(UserResponse)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return db.query(User).filter(User.company_id == current_user.company_id).all()
+    if fields:
+        return sparse_response(db.query(*[getattr(User, c) for c in fields]).all())
+    return db.query(User).all()
+
+
+@router.get("/workload", response_model=List[UserWorkload])
+def get_workload(
+    role: Optional[UserRole] = None,
+    include_inactive: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles(UserRole.admin, UserRole.manager)),
+):
+    """Open (assigned, not completed) task count per user, least loaded first."""
+    query = db.query(User)
+    if role is not None:
+        query = query.filter(User.role == role)
+    if not include_inactive:
+        query = query.filter(User.is_active == True)
+    return query.order_by(User.open_task_count, User.id).all()
 
 
 @router.patch("/{user_id}/deactivate", response_model=UserResponse)
@@ -71,11 +103,7 @@ def deactivate_user(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(UserRole.admin)),
 ):
-    user = (
-        db.query(User)
-        .filter(User.id == user_id, User.company_id == current_user.company_id)
-        .first()
-    )
+    user = entity_cache.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user.id == current_user.id:
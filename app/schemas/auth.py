@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
+from typing import Optional
 from app.models.user import UserRole
 
 
@@ -43,10 +44,29 @@ class VerifyLoginRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     must_change_password: bool = False
 
 
+# ── Refresh / Sessions ────────────────────────────────────────────────────────
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class SessionResponse(BaseModel):
+    id: int
+    device: Optional[str]
+    created_at: datetime
+    last_used_at: datetime
+    expires_at: datetime
+    current: bool = False
+
+    class Config:
+        from_attributes = True
+
+
 # ── Forgot / Reset Password ───────────────────────────────────────────────────
 
 class ForgotPasswordRequest(BaseModel):
@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+from datetime import date
+from typing import Dict, Optional
+
+
+class UsageItem(BaseModel):
+    used: int
+    limit: Optional[int]
+
+
+class CompanyUsageResponse(BaseModel):
+    company_id: int
+    plan: str
+    period: date
+    usage: Dict[str, UsageItem]
@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    created_at: datetime
+    trigger: str
+    user_id: Optional[int]
+    method: str
+    path: str
+    status_code: int
+    duration_ms: float
+
+
+class ProfileFunction(BaseModel):
+    function: str
+    calls: int
+    self_ms: float
+    total_ms: float
+
+
+class ProfileAllocation(BaseModel):
+    location: str
+    size_kb: float
+    count: int
+
+
+class ProfileMemory(BaseModel):
+    peak_kb: float
+    top_allocations: List[ProfileAllocation]
+
+
+class ProfileDetail(ProfileSummary):
+    query: str
+    loop_profiled: bool
+    functions: List[ProfileFunction]
+    report: str
+    memory: Optional[ProfileMemory]
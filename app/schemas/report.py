@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Dict, List, Optional
+import enum
+
+
+class ReportBucket(str, enum.Enum):
+    day = "day"
+    week = "week"  # weeks start on Monday
+    month = "month"
+
+
+class TaskReportRow(BaseModel):
+    period: date
+    assigned_to: Optional[int]
+    created: int
+    completed: int
+    # Current status of the tasks created in this period
+    created_by_status: Dict[str, int]
+    # Median hours from creation to completion of the tasks completed in this period
+    median_hours_to_complete: Optional[float]
+
+
+class TaskReport(BaseModel):
+    bucket: ReportBucket
+    since: datetime
+    until: datetime
+    generated_at: datetime
+    rows: List[TaskReportRow]
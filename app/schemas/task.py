@@ -1,35 +1,82 @@
-from pydantic import BaseModel
+import enum
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional
-from app.models.task import TaskStatus
+from typing import Any, Dict, Optional
+from app.models.task import TaskPriority, TaskStatus
+from app.models.task_event import TaskEventType
 
 
 class TaskCreate(BaseModel):
     title: str
     description: Optional[str] = None
     assigned_to: Optional[int] = None
+    priority: TaskPriority = TaskPriority.normal
+    due_date: Optional[datetime] = None
 
 
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[datetime] = None
+
+    @field_validator("title", "status", "priority")
+    @classmethod
+    def not_null(cls, value):
+        # Omit a field to leave it unchanged; only description and due_date can be cleared.
+        if value is None:
+            raise ValueError("may not be null")
+        return value
 
 
 class TaskAssign(BaseModel):
     assigned_to: int
 
 
+class AssignMode(str, enum.Enum):
+    auto = "auto"
+
+
 class TaskResponse(BaseModel):
     id: int
     title: str
     description: Optional[str]
     status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[datetime]
     company_id: int
     created_by: int
     assigned_to: Optional[int]
     created_at: datetime
     updated_at: datetime
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class TaskQueueItem(BaseModel):
+    """The columns stored in ix_tasks_queue, so the queue is served from the index alone."""
+    id: int
+    title: str
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class TaskEventResponse(BaseModel):
+    id: int
+    task_id: int
+    actor_id: Optional[int]
+    event_type: TaskEventType
+    from_value: Optional[str]
+    to_value: Optional[str]
+    changes: Optional[Dict[str, Any]]
+    created_at: datetime
 
     class Config:
         from_attributes = True
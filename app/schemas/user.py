@@ -9,6 +9,17 @@ class InviteUserRequest(BaseModel):
     role: UserRole
 
 
+class UserWorkload(BaseModel):
+    id: int
+    name: str
+    role: UserRole
+    is_active: bool
+    open_task_count: int
+
+    class Config:
+        from_attributes = True
+
+
 class UserResponse(BaseModel):
     id: int
     name: str
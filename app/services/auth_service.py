@@ -1,42 +1,124 @@
+import asyncio
 import random
 import string
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import case, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.core.security import hash_password, verify_password, create_access_token
+from app.db import entity_cache
 from app.models.company import Company
 from app.models.otp import OTPRecord
+from app.models.session import UserSession
+from app.models.usage import CompanyUsage
 from app.models.user import User, UserRole
 from app.schemas.auth import RegisterRequest
+from app.services import session_service
 
 OTP_EXPIRE_MINUTES = 5
 
+# Per-process OTP email state, keyed by (user_id, purpose):
+# the send currently in flight, and codes sent within the resend cooldown.
+_otp_sends_in_flight: Dict[Tuple[int, str], Tuple[str, asyncio.Future]] = {}
+_otp_recently_sent: "OrderedDict[Tuple[int, str], Tuple[str, float]]" = OrderedDict()
 
-def _invalidate_otps(db: Session, user_id: int, purpose: str) -> None:
+
+def _invalidate_otps(db: Session, user: User, purpose: str) -> None:
     db.query(OTPRecord).filter(
-        OTPRecord.user_id == user_id,
+        OTPRecord.company_id == user.company_id,
+        OTPRecord.user_id == user.id,
         OTPRecord.purpose == purpose,
         OTPRecord.is_used == False,
     ).update({"is_used": True})
 
 
-def _create_otp(db: Session, user_id: int, purpose: str) -> str:
-    _invalidate_otps(db, user_id, purpose)
+def _create_otp(db: Session, user: User, purpose: str) -> str:
+    _invalidate_otps(db, user, purpose)
     otp_code = "".join(random.choices(string.digits, k=6))
-    record = OTPRecord(user_id=user_id, otp=otp_code, purpose=purpose)
+    record = OTPRecord(company_id=user.company_id, user_id=user.id, otp=otp_code, purpose=purpose)
     db.add(record)
     db.commit()
     return otp_code
 
 
-def _verify_otp(db: Session, user_id: int, otp_code: str, purpose: str) -> OTPRecord:
+def _reuse_or_create_otp(db: Session, user: User, purpose: str) -> str:
+    """
+    Repeated "send code" clicks get the code issued moments ago instead of
+    invalidating it and inserting a new one. Never reuses an expired code, even
+    if OTP_REUSE_SECONDS is set above the OTP lifetime.
+    """
+    metrics.inc("otp_requests_total", purpose=purpose)
+    reuse_seconds = min(settings.OTP_REUSE_SECONDS, OTP_EXPIRE_MINUTES * 60)
+    reuse_cutoff = datetime.utcnow() - timedelta(seconds=reuse_seconds)
+    record = (
+        db.query(OTPRecord)
+        .filter(
+            OTPRecord.company_id == user.company_id,
+            OTPRecord.user_id == user.id,
+            OTPRecord.purpose == purpose,
+            OTPRecord.is_used == False,
+            OTPRecord.created_at >= reuse_cutoff,
+        )
+        .order_by(OTPRecord.created_at.desc())
+        .first()
+    )
+    if record:
+        metrics.inc("otp_coalesced_total", purpose=purpose, stage="issue")
+        return record.otp
+    return _create_otp(db, user, purpose)
+
+
+async def _send_otp_once(user: User, purpose: str, otp_code: str, **email) -> None:
+    """
+    Single-flight OTP email: a request for a code that is already being sent
+    waits for that send, and one sent within OTP_RESEND_COOLDOWN_SECONDS is not
+    sent again. Per process; other workers may each send once.
+    """
+    key = (user.id, purpose)
+    now = time.monotonic()
+    while _otp_recently_sent:
+        _, sent_at = next(iter(_otp_recently_sent.values()))
+        if now - sent_at < settings.OTP_RESEND_COOLDOWN_SECONDS:
+            break
+        _otp_recently_sent.popitem(last=False)
+
+    recent = _otp_recently_sent.get(key)
+    if recent and recent[0] == otp_code:
+        metrics.inc("otp_coalesced_total", purpose=purpose, stage="send")
+        return
+    in_flight = _otp_sends_in_flight.get(key)
+    if in_flight and in_flight[0] == otp_code:
+        metrics.inc("otp_coalesced_total", purpose=purpose, stage="send")
+        await asyncio.shield(in_flight[1])
+        return
+
+    from app.core.email import send_otp_email
+    send = asyncio.ensure_future(send_otp_email(email_to=user.email, otp=otp_code, **email))
+    _otp_sends_in_flight[key] = (otp_code, send)
+    try:
+        await asyncio.shield(send)
+        _otp_recently_sent[key] = (otp_code, time.monotonic())
+        _otp_recently_sent.move_to_end(key)
+    finally:
+        if _otp_sends_in_flight.get(key, (None, None))[1] is send:
+            del _otp_sends_in_flight[key]
+
+
+def _verify_otp(db: Session, user: User, otp_code: str, purpose: str) -> OTPRecord:
     expiry_cutoff = datetime.utcnow() - timedelta(minutes=OTP_EXPIRE_MINUTES)
     record = (
         db.query(OTPRecord)
         .filter(
-            OTPRecord.user_id == user_id,
+            OTPRecord.company_id == user.company_id,
+            OTPRecord.user_id == user.id,
             OTPRecord.otp == otp_code,
             OTPRecord.purpose == purpose,
             OTPRecord.is_used == False,
@@ -68,9 +150,14 @@ async def register_company_and_admin(db: Session, data: RegisterRequest) -> None
         is_active=False,
     )
     db.add(user)
-    db.flush()
-
-    otp_code = _create_otp(db, user.id, "email_verification")
+    try:
+        db.flush()
+    except IntegrityError:
+        # The email check ran against a cache that may lag another worker's insert.
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+    otp_code = _create_otp(db, user, "email_verification")
     db.commit()
 
     from app.core.email import send_otp_email
@@ -84,18 +171,18 @@ async def register_company_and_admin(db: Session, data: RegisterRequest) -> None
 
 
 def verify_email_otp(db: Session, email: str, otp_code: str) -> None:
-    user = db.query(User).filter(User.email == email).first()
+    user = entity_cache.get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP or email")
 
-    _verify_otp(db, user.id, otp_code, "email_verification")
+    _verify_otp(db, user, otp_code, "email_verification")
 
     user.is_active = True
     db.commit()
 
 
 async def initiate_login(db: Session, email: str, password: str) -> None:
-    user = db.query(User).filter(User.email == email).first()
+    user = entity_cache.get_user_by_email(db, email)
     if not user or not verify_password(password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -107,48 +194,37 @@ async def initiate_login(db: Session, email: str, password: str) -> None:
             detail="Account not verified. Please verify your email first.",
         )
 
-    otp_code = _create_otp(db, user.id, "login")
-
-    from app.core.email import send_otp_email
-    await send_otp_email(
-        email_to=user.email,
-        otp=otp_code,
+    otp_code = _reuse_or_create_otp(db, user, "login")
+    await _send_otp_once(
+        user,
+        "login",
+        otp_code,
         subject="Your TaskSphere Login OTP",
         heading="Login Verification",
         body_line="Use the OTP below to complete your login:",
     )
 
 
-def verify_login_otp(db: Session, email: str, otp_code: str) -> dict:
-    user = db.query(User).filter(User.email == email).first()
+def verify_login_otp(db: Session, email: str, otp_code: str, device: Optional[str] = None) -> dict:
+    user = entity_cache.get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP or email")
 
-    _verify_otp(db, user.id, otp_code, "login")
+    _verify_otp(db, user, otp_code, "login")
 
-    token = create_access_token(data={
-        "sub": str(user.id),
-        "company_id": user.company_id,
-        "role": user.role.value,
-    })
-    return {
-        "access_token": token,
-        "token_type": "bearer",
-        "must_change_password": user.must_change_password,
-    }
+    return session_service.start_session(db, user, device)
 
 
 async def generate_otp(db: Session, email: str) -> None:
-    user = db.query(User).filter(User.email == email).first()
+    user = entity_cache.get_user_by_email(db, email)
     if not user:
         return  # silent — prevent user enumeration
 
-    otp_code = _create_otp(db, user.id, "password_reset")
-
-    from app.core.email import send_otp_email
-    await send_otp_email(
-        email_to=user.email,
-        otp=otp_code,
+    otp_code = _reuse_or_create_otp(db, user, "password_reset")
+    await _send_otp_once(
+        user,
+        "password_reset",
+        otp_code,
         subject="Your TaskSphere Password Reset OTP",
         heading="Password Reset",
         body_line="Use the OTP below to reset your password:",
@@ -166,20 +242,21 @@ def reset_password_with_token(db: Session, reset_token: str, new_password: str)
         )
     
     user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = entity_cache.get_user(db, int(user_id))
     if not user:
         raise HTTPException(status_code=400, detail="User not found")
 
     user.password = hash_password(new_password)
+    session_service.revoke_all_sessions(db, user.id)
     db.commit()
 
 
 def verify_reset_otp_and_get_token(db: Session, email: str, otp_code: str) -> str:
-    user = db.query(User).filter(User.email == email).first()
+    user = entity_cache.get_user_by_email(db, email)
     if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP or email")
 
-    _verify_otp(db, user.id, otp_code, "password_reset")
+    _verify_otp(db, user, otp_code, "password_reset")
 
     # Generate a short-lived reset token (15 mins)
     return create_access_token(
@@ -188,7 +265,13 @@ def verify_reset_otp_and_get_token(db: Session, email: str, otp_code: str) -> st
     )
 
 
-def change_password(db: Session, user: User, old_password: str, new_password: str) -> None:
+def change_password(
+    db: Session,
+    user: User,
+    old_password: str,
+    new_password: str,
+    current_session_id: Optional[int] = None,
+) -> None:
     if not verify_password(old_password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -196,4 +279,69 @@ def change_password(db: Session, user: User, old_password: str, new_password: st
         )
     user.password = hash_password(new_password)
     user.must_change_password = False
+    # Sign out every other device; the caller's own session stays valid.
+    session_service.revoke_all_sessions(db, user.id, except_session_id=current_session_id)
     db.commit()
+
+
+def purge_expired_otps(db: Session, batch_size: int = 1000, deadline: Optional[float] = None) -> int:
+    """Delete OTPs that are used or past their expiry."""
+    expiry_cutoff = datetime.utcnow() - timedelta(minutes=OTP_EXPIRE_MINUTES)
+    purged = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(OTPRecord.id)
+            .filter((OTPRecord.is_used == True) | (OTPRecord.created_at < expiry_cutoff))
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        db.query(OTPRecord).filter(OTPRecord.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+        if len(ids) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return purged
+
+
+def cleanup_unverified_companies(
+    db: Session,
+    older_than_hours: int,
+    batch_size: int = 200,
+    deadline: Optional[float] = None,
+) -> int:
+    """
+    Remove sign-ups whose admin never verified their email.
+
+    A company whose only user is inactive can only be an unverified sign-up:
+    admins cannot deactivate themselves, so a verified sole admin stays active.
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    removed = 0
+    while True:
+        company_ids = [
+            row.company_id
+            for row in db.query(User.company_id)
+            .join(Company, Company.id == User.company_id)
+            .filter(Company.created_at < cutoff)
+            .group_by(User.company_id)
+            .having(
+                func.count(User.id) == 1,
+                func.sum(case((User.is_active == True, 1), else_=0)) == 0,
+            )
+            .limit(batch_size)
+        ]
+        if not company_ids:
+            break
+        user_ids = select(User.id).where(User.company_id.in_(company_ids))
+        db.query(OTPRecord).filter(OTPRecord.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(UserSession).filter(UserSession.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.query(User).filter(User.company_id.in_(company_ids)).delete(synchronize_session=False)
+        db.query(CompanyUsage).filter(CompanyUsage.company_id.in_(company_ids)).delete(synchronize_session=False)
+        db.query(Company).filter(Company.id.in_(company_ids)).delete(synchronize_session=False)
+        db.commit()
+        removed += len(company_ids)
+        if len(company_ids) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return removed
@@ -0,0 +1,159 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.idempotency import IdempotencyKey
+
+CLAIMED = "claimed"
+IN_FLIGHT = "in_flight"
+COMPLETED = "completed"
+MISMATCH = "mismatch"
+
+
+def _lease_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+
+
+def claim(
+    db: Session, scope_hash: str, request_hash: str, lease_id: str
+) -> Tuple[str, Optional[IdempotencyKey]]:
+    """
+    Try to become the request that executes for this key, holding it as `lease_id`.
+
+    Returns CLAIMED when the caller should run the request, COMPLETED with the
+    stored record to replay, IN_FLIGHT when another request holds the key, or
+    MISMATCH when the key was reused with a different body. An in-flight claim
+    whose lease has run out (its worker died mid-request) is taken over.
+    """
+    now = datetime.utcnow()
+    for _ in range(2):
+        record = IdempotencyKey(
+            scope_hash=scope_hash,
+            request_hash=request_hash,
+            lease_id=lease_id,
+            locked_until=_lease_expiry(),
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        )
+        db.add(record)
+        try:
+            db.commit()
+            return CLAIMED, None
+        except IntegrityError:
+            db.rollback()
+
+        existing = lookup(db, scope_hash)
+        if existing is None:
+            continue  # released between our insert and select; try again
+        if existing.expires_at <= now:
+            db.delete(existing)
+            db.commit()
+            continue
+        if existing.status_code is None and (existing.locked_until is None or existing.locked_until <= now):
+            if _take_over(db, existing, request_hash, lease_id, now):
+                return CLAIMED, None
+            continue
+        if existing.request_hash != request_hash:
+            return MISMATCH, existing
+        if existing.status_code is None:
+            return IN_FLIGHT, None
+        return COMPLETED, existing
+    return IN_FLIGHT, None
+
+
+def _take_over(db: Session, existing: IdempotencyKey, request_hash: str, lease_id: str, now: datetime) -> bool:
+    # Compare-and-set on the old lease, so only one of several retries wins.
+    taken = (
+        db.query(IdempotencyKey)
+        .filter(
+            IdempotencyKey.id == existing.id,
+            IdempotencyKey.status_code.is_(None),
+            (IdempotencyKey.lease_id == existing.lease_id)
+            if existing.lease_id is not None
+            else IdempotencyKey.lease_id.is_(None),
+        )
+        .update(
+            {
+                "request_hash": request_hash,
+                "lease_id": lease_id,
+                "locked_until": _lease_expiry(),
+                "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if taken:
+        metrics.inc("idempotency_lease_takeovers_total")
+    return bool(taken)
+
+
+def lookup(db: Session, scope_hash: str) -> Optional[IdempotencyKey]:
+    return db.query(IdempotencyKey).filter(IdempotencyKey.scope_hash == scope_hash).first()
+
+
+def _held(scope_hash: str, lease_id: str) -> list:
+    return [
+        IdempotencyKey.scope_hash == scope_hash,
+        IdempotencyKey.lease_id == lease_id,
+        IdempotencyKey.status_code.is_(None),
+    ]
+
+
+def extend(db: Session, scope_hash: str, lease_id: str) -> bool:
+    """Push the lease out while the request runs; False once it was lost to a takeover."""
+    extended = db.query(IdempotencyKey).filter(*_held(scope_hash, lease_id)).update(
+        {"locked_until": _lease_expiry()}, synchronize_session=False
+    )
+    db.commit()
+    return bool(extended)
+
+
+def complete(
+    db: Session,
+    scope_hash: str,
+    lease_id: str,
+    status_code: int,
+    content_type: Optional[str],
+    body: bytes,
+) -> None:
+    db.query(IdempotencyKey).filter(*_held(scope_hash, lease_id)).update(
+        {
+            "status_code": status_code,
+            "content_type": content_type,
+            "response_body": body,
+            "locked_until": None,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def release(db: Session, scope_hash: str, lease_id: str) -> None:
+    """Forget a claim whose request failed, so a retry runs it again."""
+    db.query(IdempotencyKey).filter(*_held(scope_hash, lease_id)).delete(synchronize_session=False)
+    db.commit()
+
+
+def purge_expired_keys(db: Session, batch_size: int = 1000, deadline: Optional[float] = None) -> int:
+    now = datetime.utcnow()
+    purged = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(IdempotencyKey.id)
+            .filter(IdempotencyKey.expires_at < now)
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        db.query(IdempotencyKey).filter(IdempotencyKey.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+        if len(ids) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return purged
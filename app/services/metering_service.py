@@ -0,0 +1,201 @@
+"""
+Per-company usage metering and plan quotas.
+
+Each worker counts usage in memory (`record`) and a background loop adds the
+deltas to `company_usage` every METERING_FLUSH_SECONDS. Quota checks read a
+per-worker cache of the stored totals (refreshed every METERING_CACHE_SECONDS)
+plus this worker's unflushed deltas, so they cost no query on the hot path.
+Usage from other workers shows up after their next flush, which makes quotas
+soft by at most a few seconds of traffic.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import entity_cache
+from app.db.session import SessionLocal
+from app.models.usage import CompanyUsage, UsageMetric
+
+logger = logging.getLogger(__name__)
+
+# Monthly limits per plan; None = unlimited.
+PLAN_LIMITS: Dict[str, Dict[UsageMetric, Optional[int]]] = {
+    "free": {
+        UsageMetric.api_calls: 50_000,
+        UsageMetric.tasks_created: 1_000,
+        UsageMetric.users_invited: 10,
+    },
+    "pro": {
+        UsageMetric.api_calls: 1_000_000,
+        UsageMetric.tasks_created: 50_000,
+        UsageMetric.users_invited: 250,
+    },
+    "enterprise": {
+        UsageMetric.api_calls: None,
+        UsageMetric.tasks_created: None,
+        UsageMetric.users_invited: None,
+    },
+}
+
+_CACHE_MAX_COMPANIES = 10_000
+
+_lock = threading.Lock()
+# (company_id, period, metric) -> count not yet written to company_usage
+_pending: Dict[Tuple[int, date, str], int] = {}
+# company_id -> (loaded_at, period, plan, stored totals by metric)
+_cache: "OrderedDict[int, Tuple[float, date, str, Dict[str, int]]]" = OrderedDict()
+
+_flusher: Optional[asyncio.Task] = None
+_stopping: Optional[asyncio.Event] = None
+
+
+def current_period() -> date:
+    return datetime.utcnow().date().replace(day=1)
+
+
+def record(company_id: int, metric: UsageMetric, amount: int = 1) -> None:
+    key = (company_id, current_period(), metric.value)
+    with _lock:
+        _pending[key] = _pending.get(key, 0) + amount
+
+
+def _load(db: Session, company_id: int, period: date) -> Tuple[float, date, str, Dict[str, int]]:
+    company = entity_cache.get_company(db, company_id)
+    plan = (company.plan if company else None) or "free"
+    totals = dict(
+        db.query(CompanyUsage.metric, CompanyUsage.value).filter(
+            CompanyUsage.company_id == company_id,
+            CompanyUsage.period == period,
+        )
+    )
+    return time.monotonic(), period, plan, totals
+
+
+def get_usage(db: Session, company_id: int) -> Tuple[str, date, Dict[str, int]]:
+    """(plan, period, usage by metric) as seen by this worker."""
+    period = current_period()
+    with _lock:
+        entry = _cache.get(company_id)
+    if (
+        entry is None
+        or entry[1] != period
+        or time.monotonic() - entry[0] > settings.METERING_CACHE_SECONDS
+    ):
+        entry = _load(db, company_id, period)
+        with _lock:
+            _cache[company_id] = entry
+            _cache.move_to_end(company_id)
+            while len(_cache) > _CACHE_MAX_COMPANIES:
+                _cache.popitem(last=False)
+
+    _, _, plan, totals = entry
+    with _lock:
+        usage = {
+            metric.value: totals.get(metric.value, 0)
+            + _pending.get((company_id, period, metric.value), 0)
+            for metric in UsageMetric
+        }
+    return plan, period, usage
+
+
+def check_quota(db: Session, company_id: int, metric: UsageMetric, amount: int = 1) -> None:
+    """429 if `amount` more would exceed the monthly limit (0: already recorded)."""
+    if not settings.QUOTAS_ENABLED:
+        return
+    plan, _, usage = get_usage(db, company_id)
+    limit = PLAN_LIMITS.get(plan, PLAN_LIMITS["free"]).get(metric)
+    if limit is not None and usage[metric.value] + amount > limit:
+        metrics.inc("quota_rejections_total", metric=metric.value, plan=plan)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Monthly {metric.value} quota of {limit} reached for the {plan} plan",
+        )
+
+
+def _insert_for(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+def flush(db: Session) -> int:
+    """Add this worker's pending counts to company_usage; returns rows upserted."""
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+    if not batch:
+        return 0
+
+    # Sorted so concurrent flushes from other workers lock rows in the same order.
+    rows = [
+        {"company_id": company_id, "period": period, "metric": metric, "value": value}
+        for (company_id, period, metric), value in sorted(batch.items())
+    ]
+    insert = _insert_for(db)
+    stmt = insert(CompanyUsage).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["company_id", "period", "metric"],
+        set_={"value": CompanyUsage.value + stmt.excluded.value},
+    )
+    try:
+        db.execute(stmt)
+        db.commit()
+    except Exception:
+        db.rollback()
+        with _lock:
+            for key, value in batch.items():
+                _pending[key] = _pending.get(key, 0) + value
+        raise
+
+    # Keep cached totals in step with what was just written.
+    with _lock:
+        for (company_id, period, metric), value in batch.items():
+            entry = _cache.get(company_id)
+            if entry is not None and entry[1] == period:
+                entry[3][metric] = entry[3].get(metric, 0) + value
+    metrics.inc("metering_flushed_rows_total", len(rows))
+    return len(rows)
+
+
+def _flush_once() -> int:
+    db = SessionLocal()
+    try:
+        return flush(db)
+    finally:
+        db.close()
+
+
+async def _flush_loop() -> None:
+    while not _stopping.is_set():
+        try:
+            await asyncio.wait_for(_stopping.wait(), settings.METERING_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await run_in_threadpool(_flush_once)
+        except Exception:
+            logger.exception("Usage flush failed; will retry")
+
+
+def start_flusher() -> None:
+    """Start this worker's flush loop (every worker flushes its own counters)."""
+    global _flusher, _stopping
+    _stopping = asyncio.Event()
+    _flusher = asyncio.create_task(_flush_loop())
+
+
+async def stop_flusher() -> None:
+    """Stop the loop; it writes out the remaining counts on its way out."""
+    if _flusher is None:
+        return
+    _stopping.set()
+    await _flusher
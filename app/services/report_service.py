@@ -0,0 +1,207 @@
+"""
+Task throughput reports, aggregated in SQL.
+
+A task counts as created in the period of its `created_at`. It counts as
+completed in the period of its last status change to completed in task history.
+Tasks with no such event fall back to `updated_at`, for example when the
+history is older than TASK_EVENT_RETENTION_DAYS. Live and archived tasks are
+included; deleted tasks are not.
+Reports are cached per company and query for REPORT_CACHE_SECONDS.
+"""
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, cast, extract, func, literal_column, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.task import Task, TaskArchive, TaskStatus
+from app.models.task_event import TaskEvent, TaskEventType
+from app.schemas.report import ReportBucket
+
+DEFAULT_RANGE = timedelta(weeks=12)
+MAX_RANGE = timedelta(days=731)
+_CACHE_MAX_ENTRIES = 1_000
+
+_SQLITE_BUCKET_MODIFIERS = {
+    ReportBucket.day: (),
+    ReportBucket.week: ("weekday 0", "-6 days"),
+    ReportBucket.month: ("start of month",),
+}
+
+_lock = threading.Lock()
+# (company_id, bucket, since, until, assigned_to) -> (expires_at, report)
+_cache: "OrderedDict[tuple, Tuple[float, dict]]" = OrderedDict()
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _bucket(db: Session, column, bucket: ReportBucket):
+    # Literal (not bound) arguments, so the SELECT and GROUP BY expressions are identical.
+    if _is_postgres(db):
+        return cast(func.date_trunc(literal_column(f"'{bucket.value}'"), column), Date)
+    modifiers = [literal_column(f"'{m}'") for m in _SQLITE_BUCKET_MODIFIERS[bucket]]
+    return func.date(column, *modifiers)
+
+
+def _hours_between(db: Session, start, end):
+    if _is_postgres(db):
+        return extract("epoch", end - start) / 3600
+    return (func.julianday(end) - func.julianday(start)) * 24
+
+
+def _report_tasks():
+    columns = ("id", "assigned_to", "status", "created_at", "updated_at")
+    return union_all(
+        select(*[getattr(Task, c) for c in columns]).where(Task.deleted_at.is_(None)),
+        select(*[getattr(TaskArchive, c) for c in columns]),
+    ).subquery("report_tasks")
+
+
+def _completions():
+    return (
+        select(TaskEvent.task_id, func.max(TaskEvent.created_at).label("completed_at"))
+        .where(
+            TaskEvent.event_type == TaskEventType.status_changed,
+            TaskEvent.to_value == TaskStatus.completed.value,
+        )
+        .group_by(TaskEvent.task_id)
+        .subquery("completions")
+    )
+
+
+def _build(
+    db: Session,
+    bucket: ReportBucket,
+    since: datetime,
+    until: datetime,
+    assigned_to: Optional[int],
+) -> dict:
+    tasks = _report_tasks()
+    assignee_filter = [tasks.c.assigned_to == assigned_to] if assigned_to is not None else []
+    rows: Dict[tuple, dict] = {}
+
+    def row(period, assignee) -> dict:
+        return rows.setdefault((str(period), assignee), {
+            "period": period,
+            "assigned_to": assignee,
+            "created": 0,
+            "completed": 0,
+            "created_by_status": {},
+            "median_hours_to_complete": None,
+        })
+
+    created_period = _bucket(db, tasks.c.created_at, bucket)
+    created = db.execute(
+        select(created_period, tasks.c.assigned_to, tasks.c.status, func.count())
+        .where(tasks.c.created_at >= since, tasks.c.created_at < until, *assignee_filter)
+        .group_by(created_period, tasks.c.assigned_to, tasks.c.status)
+    )
+    for period, assignee, task_status, count in created:
+        entry = row(period, assignee)
+        entry["created"] += count
+        entry["created_by_status"][TaskStatus(task_status).value] = count
+
+    completions = _completions()
+    completed_at = func.coalesce(completions.c.completed_at, tasks.c.updated_at)
+    completed_period = _bucket(db, completed_at, bucket)
+    hours = _hours_between(db, tasks.c.created_at, completed_at)
+    completed_filters = [
+        tasks.c.status == TaskStatus.completed,
+        completed_at >= since,
+        completed_at < until,
+        *assignee_filter,
+    ]
+    source = tasks.outerjoin(completions, completions.c.task_id == tasks.c.id)
+
+    if _is_postgres(db):
+        completed = db.execute(
+            select(
+                completed_period,
+                tasks.c.assigned_to,
+                func.count(),
+                func.percentile_cont(0.5).within_group(hours),
+            )
+            .select_from(source)
+            .where(*completed_filters)
+            .group_by(completed_period, tasks.c.assigned_to)
+        )
+        for period, assignee, count, median in completed:
+            entry = row(period, assignee)
+            entry["completed"] = count
+            entry["median_hours_to_complete"] = round(float(median), 2) if median is not None else None
+    else:
+        # SQLite has no percentile aggregate; take the median of the per-task durations here.
+        durations: Dict[tuple, list] = {}
+        for period, assignee, value in db.execute(
+            select(completed_period, tasks.c.assigned_to, hours).select_from(source).where(*completed_filters)
+        ):
+            durations.setdefault((period, assignee), []).append(value)
+        for (period, assignee), values in durations.items():
+            entry = row(period, assignee)
+            entry["completed"] = len(values)
+            entry["median_hours_to_complete"] = round(statistics.median(values), 2)
+
+    return {
+        "bucket": bucket,
+        "since": since,
+        "until": until,
+        "generated_at": datetime.utcnow(),
+        "rows": sorted(
+            rows.values(),
+            key=lambda r: (str(r["period"]), r["assigned_to"] is not None, r["assigned_to"] or 0),
+        ),
+    }
+
+
+def get_task_report(
+    db: Session,
+    company_id: int,
+    bucket: ReportBucket = ReportBucket.week,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    assigned_to: Optional[int] = None,
+) -> dict:
+    """
+    Created / completed counts and median completion time per period and assignee.
+    Defaults to the last 12 weeks. A cached report may be up to
+    REPORT_CACHE_SECONDS old; see `generated_at`.
+    """
+    key = (company_id, bucket, since, until, assigned_to)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > now:
+            _cache.move_to_end(key)
+            metrics.inc("report_cache_requests_total", result="hit")
+            return entry[1]
+    metrics.inc("report_cache_requests_total", result="miss")
+
+    until_at = until or datetime.utcnow()
+    since_at = since or until_at - DEFAULT_RANGE
+    if since_at >= until_at:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="since must be before until")
+    if until_at - since_at > MAX_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Report range is limited to {MAX_RANGE.days} days",
+        )
+
+    started = time.perf_counter()
+    report = _build(db, bucket, since_at, until_at, assigned_to)
+    metrics.observe("report_build_seconds", time.perf_counter() - started)
+
+    with _lock:
+        _cache[key] = (time.monotonic() + settings.REPORT_CACHE_SECONDS, report)
+        _cache.move_to_end(key)
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return report
@@ -0,0 +1,167 @@
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, contains_eager
+
+from app.core.config import settings
+from app.core.security import create_access_token, generate_refresh_token, hash_refresh_token
+from app.models.session import UserSession
+from app.models.user import User
+
+
+def _create_user_access_token(user: User, session_id: int) -> str:
+    return create_access_token(data={
+        "sub": str(user.id),
+        "company_id": user.company_id,
+        "role": user.role.value,
+        "sid": session_id,
+    })
+
+
+def start_session(db: Session, user: User, device: Optional[str] = None) -> dict:
+    refresh_token = generate_refresh_token()
+    now = datetime.utcnow()
+    record = UserSession(
+        user_id=user.id,
+        token_hash=hash_refresh_token(refresh_token),
+        device=device[:255] if device else None,
+        created_at=now,
+        last_used_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(record)
+    db.commit()
+    return {
+        "access_token": _create_user_access_token(user, record.id),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "must_change_password": user.must_change_password,
+    }
+
+
+def refresh_session(db: Session, refresh_token: str) -> dict:
+    token_hash = hash_refresh_token(refresh_token)
+    record = (
+        db.query(UserSession)
+        .join(UserSession.user)
+        .options(contains_eager(UserSession.user))
+        .filter(UserSession.token_hash == token_hash)
+        .first()
+    )
+    now = datetime.utcnow()
+    if (
+        not record
+        or record.revoked_at is not None
+        or record.expires_at <= now
+        or not record.user.is_active
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+
+    # Rotate in place. The token_hash guard makes this a compare-and-set, so
+    # two concurrent refreshes with the same token cannot both succeed.
+    new_refresh_token = generate_refresh_token()
+    rotated = (
+        db.query(UserSession)
+        .filter(UserSession.id == record.id, UserSession.token_hash == token_hash)
+        .update(
+            {
+                "token_hash": hash_refresh_token(new_refresh_token),
+                "last_used_at": now,
+                "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            },
+            synchronize_session=False,
+        )
+    )
+    if not rotated:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+        )
+    db.commit()
+
+    user = record.user
+    return {
+        "access_token": _create_user_access_token(user, record.id),
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer",
+        "must_change_password": user.must_change_password,
+    }
+
+
+def list_sessions(db: Session, user: User) -> List[UserSession]:
+    return (
+        db.query(UserSession)
+        .filter(
+            UserSession.user_id == user.id,
+            UserSession.revoked_at.is_(None),
+            UserSession.expires_at > datetime.utcnow(),
+        )
+        .order_by(UserSession.last_used_at.desc())
+        .all()
+    )
+
+
+def is_session_active(db: Session, session_id: Optional[int]) -> bool:
+    """Primary-key check made on every authenticated request."""
+    if session_id is None:
+        return False
+    return db.query(
+        db.query(UserSession.id)
+        .filter(
+            UserSession.id == session_id,
+            UserSession.revoked_at.is_(None),
+            UserSession.expires_at > datetime.utcnow(),
+        )
+        .exists()
+    ).scalar()
+
+
+def revoke_session(db: Session, user_id: int, session_id: int, missing_ok: bool = False) -> None:
+    revoked = (
+        db.query(UserSession)
+        .filter(
+            UserSession.id == session_id,
+            UserSession.user_id == user_id,
+            UserSession.revoked_at.is_(None),
+        )
+        .update({"revoked_at": datetime.utcnow()}, synchronize_session=False)
+    )
+    if not revoked and not missing_ok:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    db.commit()
+
+
+def revoke_all_sessions(db: Session, user_id: int, except_session_id: Optional[int] = None) -> None:
+    query = db.query(UserSession).filter(
+        UserSession.user_id == user_id,
+        UserSession.revoked_at.is_(None),
+    )
+    if except_session_id is not None:
+        query = query.filter(UserSession.id != except_session_id)
+    query.update({"revoked_at": datetime.utcnow()}, synchronize_session=False)
+
+
+def purge_expired_sessions(db: Session, batch_size: int = 1000, deadline: Optional[float] = None) -> int:
+    """Delete sessions that are expired or revoked; their tokens are rejected either way."""
+    now = datetime.utcnow()
+    purged = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(UserSession.id)
+            .filter((UserSession.expires_at < now) | UserSession.revoked_at.isnot(None))
+            .limit(batch_size)
+        ]
+        if not ids:
+            break
+        db.query(UserSession).filter(UserSession.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+        if len(ids) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return purged
@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.models.task import Task, TaskArchive
+from app.models.task_event import TaskEvent, TaskEventType
+from app.models.user import User, UserRole
+
+
+def record_event(
+    db: Session,
+    task: Task,
+    actor: Optional[User],
+    event_type: TaskEventType,
+    from_value: Optional[str] = None,
+    to_value: Optional[str] = None,
+    changes: Optional[dict] = None,
+) -> None:
+    """Stage a history row. It is committed together with the task change."""
+    db.add(TaskEvent(
+        task_id=task.id,
+        company_id=task.company_id,
+        actor_id=actor.id if actor else None,
+        event_type=event_type,
+        from_value=from_value,
+        to_value=to_value,
+        changes=changes,
+    ))
+
+
+def get_task_history(
+    db: Session,
+    task_id: int,
+    current_user: User,
+    limit: int = 50,
+    before_id: Optional[int] = None,
+) -> List[TaskEvent]:
+    # History outlives the live row, so deleted and archived tasks are still visible here.
+    task = (
+        db.query(Task)
+        .filter(Task.id == task_id)
+        .first()
+    ) or (
+        db.query(TaskArchive)
+        .filter(TaskArchive.id == task_id)
+        .first()
+    )
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+
+    if current_user.role == UserRole.employee and task.assigned_to != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view tasks assigned to you",
+        )
+
+    query = db.query(TaskEvent).filter(TaskEvent.task_id == task_id)
+    if before_id is not None:
+        query = query.filter(TaskEvent.id < before_id)
+
+    return query.order_by(TaskEvent.id.desc()).limit(limit).all()
+
+
+def prune_task_events(
+    db: Session,
+    compact_after_days: int,
+    retain_days: int,
+    batch_size: int = 1000,
+    deadline: Optional[float] = None,
+) -> int:
+    """
+    Compaction: field-edit events older than `compact_after_days` are dropped,
+    keeping lifecycle events (created / status / assignment / deleted).
+    Retention: every event older than `retain_days` is dropped.
+    Deletes run in primary-key batches so each transaction stays short; the
+    loop stops early once `time.monotonic()` passes `deadline`.
+    """
+    now = datetime.utcnow()
+    compact_cutoff = now - timedelta(days=compact_after_days)
+    retain_cutoff = now - timedelta(days=retain_days)
+
+    deleted = 0
+    for criteria in (
+        [TaskEvent.created_at < retain_cutoff],
+        [TaskEvent.created_at < compact_cutoff, TaskEvent.event_type == TaskEventType.updated],
+    ):
+        while True:
+            ids = [row.id for row in db.query(TaskEvent.id).filter(*criteria).limit(batch_size)]
+            if not ids:
+                break
+            db.query(TaskEvent).filter(TaskEvent.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            deleted += len(ids)
+            if deadline and time.monotonic() >= deadline:
+                return deleted  # out of budget: skip the remaining passes too
+            if len(ids) < batch_size:
+                break
+    return deleted
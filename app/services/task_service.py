@@ -1,24 +1,154 @@
-from datetime import datetime
-from typing import List, Optional
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select, union_all, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from app.models.task import Task
+from app.db import entity_cache
+from app.models.task import Task, TaskArchive, TaskStatus
+from app.models.task_event import TaskEventType
+from app.models.usage import UsageMetric
 from app.models.user import User, UserRole
 from app.schemas.task import TaskAssign, TaskCreate, TaskUpdate
+from app.services import metering_service
+from app.services.task_event_service import record_event
 
 
-def create_task(db: Session, data: TaskCreate, current_user: User) -> Task:
+# Columns shared by `tasks` and `tasks_archive`, in archive insert order.
+_TASK_COLUMNS = (
+    "id", "title", "description", "status", "priority", "due_date", "company_id",
+    "created_by", "assigned_to", "created_at", "updated_at", "version",
+)
+
+
+# Tenant isolation (company_id) is applied by the session, see app/db/tenant.py.
+
+def _visible_task_filters(
+    model,
+    current_user: User,
+    search: Optional[str],
+    overdue: bool = False,
+    due_before: Optional[datetime] = None,
+) -> list:
+    filters = []
+
+    # Employees only see their assigned tasks
+    if current_user.role == UserRole.employee:
+        filters.append(model.assigned_to == current_user.id)
+
+    if search:
+        filters.append(model.title.ilike(f"%{search}%"))
+
+    if overdue:
+        filters.append(model.due_date < datetime.utcnow())
+        filters.append(model.status != TaskStatus.completed)
+
+    if due_before is not None:
+        filters.append(model.due_date < due_before)
+
+    return filters
+
+
+def _batch_criteria(rows) -> list:
+    # company_id lets Postgres prune to the affected partitions when tasks is partitioned.
+    return [
+        Task.company_id.in_({row.company_id for row in rows}),
+        Task.id.in_([row.id for row in rows]),
+    ]
+
+
+def _adjust_open_count(db: Session, user_id: Optional[int], delta: int) -> None:
+    # A relative UPDATE, so concurrent requests never lose each other's changes.
+    if user_id is None:
+        return
+    # open_task_count is not cached, so this need not invalidate the entity cache.
+    db.query(User).filter(User.id == user_id).execution_options(skip_cache_invalidation=True).update(
+        {User.open_task_count: User.open_task_count + delta}, synchronize_session=False
+    )
+
+
+def pick_least_loaded_user(db: Session, roles: List[UserRole]) -> User:
+    """
+    Active user with the fewest open tasks among `roles`: one ix_users_workload
+    seek per role. Rows already locked by a concurrent auto-assign are skipped so
+    simultaneous requests spread over different users.
+    """
+    candidates = [
+        db.query(User)
+        .filter(User.is_active == True, User.role == role)
+        .order_by(User.open_task_count, User.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .first()
+        for role in set(roles)
+    ]
+    candidates = [user for user in candidates if user is not None]
+    if not candidates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"No active user to auto-assign. Role(s): {sorted(r.value for r in roles)}",
+        )
+    return min(candidates, key=lambda user: (user.open_task_count, user.id))
+
+
+def _commit_versioned(db: Session) -> None:
+    """Commit a Task write; a concurrent change to the same version becomes a 409."""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task was modified concurrently. Reload it and retry.",
+        )
+
+
+def _get_live_task(db: Session, task_id: int, current_user: User) -> Task:
+    task = (
+        db.query(Task)
+        .filter(Task.id == task_id, Task.deleted_at.is_(None))
+        .first()
+    )
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return task
+
+
+def create_task(
+    db: Session,
+    data: TaskCreate,
+    current_user: User,
+    auto_assign_roles: Optional[List[UserRole]] = None,
+) -> Task:
+    assigned_to = data.assigned_to
+    if auto_assign_roles:
+        assigned_to = pick_least_loaded_user(db, auto_assign_roles).id
+    elif assigned_to is not None:
+        # Tenant scoping guarantees the assignee is in the same company
+        if not entity_cache.get_user(db, assigned_to):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee not found in your company")
+
     task = Task(
         title=data.title,
         description=data.description,
-        assigned_to=data.assigned_to,
-        company_id=current_user.company_id,
+        assigned_to=assigned_to,
+        priority=data.priority,
+        due_date=data.due_date,
         created_by=current_user.id,
     )
     db.add(task)
+    db.flush()
+    _adjust_open_count(db, task.assigned_to, 1)
+    record_event(
+        db, task, current_user, TaskEventType.created,
+        to_value=str(task.assigned_to) if task.assigned_to else None,
+    )
     db.commit()
+    metering_service.record(current_user.company_id, UsageMetric.tasks_created)
     db.refresh(task)
     return task
 
@@ -29,78 +159,295 @@ def get_tasks(
     skip: int = 0,
     limit: int = 20,
     search: Optional[str] = None,
+    include_archived: bool = False,
+    overdue: bool = False,
+    due_before: Optional[datetime] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[Task]:
-    query = db.query(Task).filter(Task.company_id == current_user.company_id)
+    """
+    Full Task objects, or rows of just `fields` when given: the column list is
+    pushed into the SELECT, so unrequested columns (e.g. description) are never read.
+    """
+    live_filters = _visible_task_filters(Task, current_user, search, overdue, due_before) + [
+        Task.deleted_at.is_(None)
+    ]
 
-    # Employees only see their assigned tasks
-    if current_user.role == UserRole.employee:
-        query = query.filter(Task.assigned_to == current_user.id)
+    if not include_archived:
+        if fields:
+            query = db.query(*[getattr(Task, c) for c in fields])
+        else:
+            query = db.query(Task)
+        return query.filter(*live_filters).order_by(Task.id).offset(skip).limit(limit).all()
 
-    if search:
-        query = query.filter(Task.title.ilike(f"%{search}%"))
+    columns = fields or _TASK_COLUMNS
+    combined = union_all(
+        select(*[getattr(Task, c) for c in columns]).where(*live_filters),
+        select(*[getattr(TaskArchive, c) for c in columns]).where(
+            *_visible_task_filters(TaskArchive, current_user, search, overdue, due_before)
+        ),
+    ).subquery()
+    return db.execute(
+        select(combined).order_by(combined.c.id).offset(skip).limit(limit)
+    ).all()
 
-    return query.offset(skip).limit(limit).all()
 
+def get_task_queue(
+    db: Session,
+    current_user: User,
+    limit: int = 50,
+    overdue: bool = False,
+) -> list:
+    """
+    Open tasks assigned to the caller, most urgent first. Only columns stored in
+    ix_tasks_queue are selected, so this is an index-only range scan on Postgres.
+    """
+    query = db.query(Task.id, Task.title, Task.status, Task.priority, Task.due_date).filter(
+        Task.assigned_to == current_user.id,
+        Task.status != TaskStatus.completed,
+        Task.deleted_at.is_(None),
+    )
+    if overdue:
+        query = query.filter(Task.due_date < datetime.utcnow())
 
-def update_task(db: Session, task_id: int, data: TaskUpdate, current_user: User) -> Task:
-    task = (
-        db.query(Task)
-        .filter(Task.id == task_id, Task.company_id == current_user.company_id)
-        .first()
+    return (
+        query.order_by(Task.priority.desc(), Task.due_date.asc().nullslast(), Task.id)
+        .limit(limit)
+        .all()
     )
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    # Employees can only update their own assigned tasks
+
+def update_task(
+    db: Session,
+    task_id: int,
+    data: TaskUpdate,
+    current_user: User,
+    if_match: Optional[List[int]] = None,
+) -> Task:
+    task = _get_live_task(db, task_id, current_user)
+
+    # Employees can only update their own assigned tasks. Checked before the
+    # precondition so a 409 never reveals the version of a task they cannot edit.
     if current_user.role == UserRole.employee and task.assigned_to != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only update tasks assigned to you",
         )
 
+    # The flush below only applies if `version` is still the one read here, so a
+    # write that lands in between also ends in a 409 rather than being overwritten.
+    if if_match is not None and task.version not in if_match:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Version mismatch: task is at version {task.version}",
+        )
+
     update_data = data.model_dump(exclude_unset=True)
+    edits = {}
     for field, value in update_data.items():
+        old_value = getattr(task, field)
+        if old_value == value:
+            continue
+        if field == "status":
+            record_event(
+                db, task, current_user, TaskEventType.status_changed,
+                from_value=old_value.value, to_value=value.value,
+            )
+            if (old_value == TaskStatus.completed) != (value == TaskStatus.completed):
+                _adjust_open_count(db, task.assigned_to, -1 if value == TaskStatus.completed else 1)
+        elif field == "description":
+            # Keep the log compact: record that the description changed, not its text.
+            edits[field] = None
+        else:
+            edits[field] = jsonable_encoder([old_value, value])
         setattr(task, field, value)
+        if field == "due_date":
+            task.reminder_sent_at = None
+    if edits:
+        record_event(db, task, current_user, TaskEventType.updated, changes=edits)
 
     task.updated_at = datetime.utcnow()
-    db.commit()
+    _commit_versioned(db)
     db.refresh(task)
     return task
 
 
-def assign_task(db: Session, task_id: int, data: TaskAssign, current_user: User) -> Task:
-    task = (
-        db.query(Task)
-        .filter(Task.id == task_id, Task.company_id == current_user.company_id)
-        .first()
-    )
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+def assign_task(
+    db: Session,
+    task_id: int,
+    data: Optional[TaskAssign],
+    current_user: User,
+    auto_assign_roles: Optional[List[UserRole]] = None,
+) -> Task:
+    task = _get_live_task(db, task_id, current_user)
 
-    # Ensure assignee is in the same company
-    assignee = (
-        db.query(User)
-        .filter(User.id == data.assigned_to, User.company_id == current_user.company_id)
-        .first()
-    )
-    if not assignee:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee not found in your company")
+    if auto_assign_roles:
+        assignee = pick_least_loaded_user(db, auto_assign_roles)
+    elif data is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="assigned_to is required unless assign=auto",
+        )
+    else:
+        # Tenant scoping guarantees the assignee is in the same company
+        assignee = entity_cache.get_user(db, data.assigned_to)
+        if not assignee:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignee not found in your company")
 
-    task.assigned_to = data.assigned_to
+    if task.assigned_to != assignee.id:
+        record_event(
+            db, task, current_user, TaskEventType.assigned,
+            from_value=str(task.assigned_to) if task.assigned_to else None,
+            to_value=str(assignee.id),
+        )
+        if task.status != TaskStatus.completed:
+            _adjust_open_count(db, task.assigned_to, -1)
+            _adjust_open_count(db, assignee.id, 1)
+    task.assigned_to = assignee.id
     task.updated_at = datetime.utcnow()
-    db.commit()
+    _commit_versioned(db)
     db.refresh(task)
     return task
 
 
 def delete_task(db: Session, task_id: int, current_user: User) -> None:
-    task = (
-        db.query(Task)
-        .filter(Task.id == task_id, Task.company_id == current_user.company_id)
-        .first()
+    task = _get_live_task(db, task_id, current_user)
+
+    record_event(db, task, current_user, TaskEventType.deleted)
+    if task.status != TaskStatus.completed:
+        _adjust_open_count(db, task.assigned_to, -1)
+    task.deleted_at = datetime.utcnow()
+    _commit_versioned(db)
+
+
+def get_due_reminders(db: Session, lead_hours: int, limit: int = 100) -> List[Tuple[Task, User]]:
+    """Open, assigned tasks due within `lead_hours` whose reminder has not been sent."""
+    horizon = datetime.utcnow() + timedelta(hours=lead_hours)
+    return (
+        db.query(Task, User)
+        .join(User, User.id == Task.assigned_to)
+        .filter(
+            Task.due_date <= horizon,
+            Task.reminder_sent_at.is_(None),
+            Task.status != TaskStatus.completed,
+            Task.deleted_at.is_(None),
+            User.is_active == True,
+        )
+        .order_by(Task.due_date)
+        .limit(limit)
+        .all()
     )
-    if not task:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
-    db.delete(task)
+
+def mark_reminders_sent(db: Session, tasks: List[Task]) -> None:
+    if not tasks:
+        return
+    db.query(Task).filter(*_batch_criteria(tasks)).update(
+        {"reminder_sent_at": datetime.utcnow()}, synchronize_session=False
+    )
     db.commit()
+
+
+def recount_open_tasks(
+    db: Session,
+    batch_size: int = 500,
+    deadline: Optional[float] = None,
+) -> int:
+    """Recompute users.open_task_count from tasks; returns how many counts were off."""
+    open_count = (
+        select(func.count(Task.id))
+        .where(
+            Task.assigned_to == User.id,
+            Task.status != TaskStatus.completed,
+            Task.deleted_at.is_(None),
+        )
+        .correlate(User)
+        .scalar_subquery()
+    )
+    fixed = 0
+    last_id = 0
+    while True:
+        ids = [
+            row.id
+            for row in db.query(User.id).filter(User.id > last_id).order_by(User.id).limit(batch_size)
+        ]
+        if not ids:
+            break
+        result = db.execute(
+            update(User)
+            .where(User.id.in_(ids), User.open_task_count != open_count)
+            .values(open_task_count=open_count)
+            .execution_options(synchronize_session=False, skip_cache_invalidation=True)
+        )
+        db.commit()
+        fixed += result.rowcount
+        last_id = ids[-1]
+        if len(ids) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return fixed
+
+
+def archive_completed_tasks(
+    db: Session,
+    older_than_days: int,
+    batch_size: int = 500,
+    deadline: Optional[float] = None,
+) -> int:
+    """Move completed tasks untouched for `older_than_days` into `tasks_archive`."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    while True:
+        rows = (
+            db.query(Task.id, Task.company_id)
+            .filter(
+                Task.status == TaskStatus.completed,
+                Task.deleted_at.is_(None),
+                Task.updated_at < cutoff,
+            )
+            .order_by(Task.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+        batch = _batch_criteria(rows)
+        db.execute(
+            insert(TaskArchive).from_select(
+                list(_TASK_COLUMNS),
+                select(*[getattr(Task, c) for c in _TASK_COLUMNS]).where(*batch),
+            )
+        )
+        db.execute(delete(Task).where(*batch))
+        db.commit()
+        moved += len(rows)
+        if len(rows) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return moved
+
+
+def purge_deleted_tasks(
+    db: Session,
+    older_than_days: int,
+    batch_size: int = 500,
+    deadline: Optional[float] = None,
+) -> int:
+    """Hard-delete tasks that were soft-deleted more than `older_than_days` ago."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        rows = (
+            db.query(Task.id, Task.company_id)
+            .filter(Task.deleted_at < cutoff)
+            .order_by(Task.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not rows:
+            break
+        db.execute(delete(Task).where(*_batch_criteria(rows)))
+        db.commit()
+        purged += len(rows)
+        if len(rows) < batch_size or (deadline and time.monotonic() >= deadline):
+            break
+    return purged
@@ -0,0 +1,34 @@
+"""
+Production runner: gunicorn -c gunicorn.conf.py app.main:app
+
+Worker count defaults to the CPUs available to this process; override with
+WEB_CONCURRENCY. The count is exported before the app is imported so each
+worker sizes its DB pool to DB_MAX_CONNECTIONS / WEB_CONCURRENCY.
+"""
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY") or len(os.sched_getaffinity(0)))
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+from app.core.config import settings  # noqa: E402  (must see WEB_CONCURRENCY)
+
+wsgi_app = "app.main:app"
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "app.core.worker.VoltaskWorker"
+
+# Import the app once in the master; workers share its memory copy-on-write.
+preload_app = True
+
+# uvicorn drains requests for GRACEFUL_TIMEOUT, then the shutdown hook drains
+# emails; gunicorn only kills the worker after both had their chance.
+graceful_timeout = settings.GRACEFUL_TIMEOUT + settings.EMAIL_DRAIN_SECONDS + 5
+timeout = 60
+keepalive = 5
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Never share pooled connections opened in the master with the children.
+    from app.db.session import engine
+
+    engine.dispose(close=False)
@@ -0,0 +1,123 @@
+"""sessions, task history, soft delete / archive, tenant indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+task_status = postgresql.ENUM(
+    "pending", "in_progress", "completed", name="taskstatus", create_type=False
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_sessions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(length=64), nullable=False),
+        sa.Column("device", sa.String(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_used_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_sessions_id", "user_sessions", ["id"])
+    op.create_index("ix_user_sessions_user_id", "user_sessions", ["user_id"])
+    op.create_index("ix_user_sessions_token_hash", "user_sessions", ["token_hash"], unique=True)
+
+    op.create_table(
+        "task_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), nullable=True),
+        sa.Column(
+            "event_type",
+            sa.Enum(
+                "created", "updated", "status_changed", "assigned", "deleted",
+                name="taskeventtype",
+            ),
+            nullable=False,
+        ),
+        sa.Column("from_value", sa.String(length=50), nullable=True),
+        sa.Column("to_value", sa.String(length=50), nullable=True),
+        sa.Column("changes", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["actor_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_task_events_company_created", "task_events", ["company_id", "created_at"])
+    op.create_index("ix_task_events_task_id", "task_events", ["task_id", "id"])
+
+    op.add_column("tasks", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_tasks_company_live",
+        "tasks",
+        ["company_id", "id"],
+        postgresql_where=sa.text("deleted_at IS NULL"),
+        sqlite_where=sa.text("deleted_at IS NULL"),
+    )
+    op.create_index("ix_tasks_company_assignee", "tasks", ["company_id", "assigned_to"])
+
+    op.create_table(
+        "tasks_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("status", task_status, nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("assigned_to", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.ForeignKeyConstraint(["assigned_to"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tasks_archive_company_id", "tasks_archive", ["company_id", "id"])
+
+    op.create_index("ix_users_company_role", "users", ["company_id", "role"])
+
+    op.add_column("otp_records", sa.Column("company_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE otp_records SET company_id = "
+        "(SELECT users.company_id FROM users WHERE users.id = otp_records.user_id)"
+    )
+    with op.batch_alter_table("otp_records") as batch:
+        batch.alter_column("company_id", existing_type=sa.Integer(), nullable=False)
+        batch.create_foreign_key("fk_otp_records_company_id", "companies", ["company_id"], ["id"])
+    op.create_index(
+        "ix_otp_records_company_user_purpose",
+        "otp_records",
+        ["company_id", "user_id", "purpose", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_otp_records_company_user_purpose", table_name="otp_records")
+    with op.batch_alter_table("otp_records") as batch:
+        batch.drop_constraint("fk_otp_records_company_id", type_="foreignkey")
+        batch.drop_column("company_id")
+    op.drop_index("ix_users_company_role", table_name="users")
+    op.drop_table("tasks_archive")
+    op.drop_index("ix_tasks_company_assignee", table_name="tasks")
+    op.drop_index("ix_tasks_company_live", table_name="tasks")
+    op.drop_column("tasks", "deleted_at")
+    op.drop_table("task_events")
+    sa.Enum(name="taskeventtype").drop(op.get_bind(), checkfirst=True)
+    op.drop_table("user_sessions")
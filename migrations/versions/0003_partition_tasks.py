@@ -0,0 +1,33 @@
+"""optionally partition tasks by company_id
+
+Only runs on Postgres, and only when TASKS_HASH_PARTITIONS > 0. Otherwise the
+revision is recorded and the table stays a plain heap. See app/db/partitioning.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.core.config import settings
+from app.db import partitioning
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql" or settings.TASKS_HASH_PARTITIONS <= 0:
+        return
+    partitioning.partition_tasks(conn, settings.TASKS_HASH_PARTITIONS)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != "postgresql" or not partitioning.is_partitioned(conn):
+        return
+    partitioning.unpartition_tasks(conn)
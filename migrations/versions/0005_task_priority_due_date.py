@@ -0,0 +1,39 @@
+"""task priority, due date and queue index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("tasks", "tasks_archive"):
+        op.add_column(table, sa.Column("priority", sa.SmallInteger(), nullable=False, server_default="1"))
+        op.add_column(table, sa.Column("due_date", sa.DateTime(), nullable=True))
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column("priority", existing_type=sa.SmallInteger(), server_default=None)
+
+    op.create_index(
+        "ix_tasks_queue",
+        "tasks",
+        ["assigned_to", sa.text("priority DESC"), "due_date"],
+        postgresql_where=sa.text("status != 'completed' AND deleted_at IS NULL"),
+        sqlite_where=sa.text("status != 'completed' AND deleted_at IS NULL"),
+        postgresql_include=["company_id", "title", "status"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_queue", table_name="tasks")
+    for table in ("tasks_archive", "tasks"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("due_date")
+            batch.drop_column("priority")
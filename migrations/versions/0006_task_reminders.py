@@ -0,0 +1,33 @@
+"""task due-date reminders
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+_PENDING_REMINDER = "reminder_sent_at IS NULL AND status != 'completed' AND deleted_at IS NULL"
+
+
+def upgrade() -> None:
+    op.add_column("tasks", sa.Column("reminder_sent_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_tasks_reminder_due",
+        "tasks",
+        ["due_date"],
+        postgresql_where=sa.text(_PENDING_REMINDER),
+        sqlite_where=sa.text(_PENDING_REMINDER),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_reminder_due", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch:
+        batch.drop_column("reminder_sent_at")
@@ -0,0 +1,42 @@
+"""per-user open task count
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("open_task_count", sa.Integer(), nullable=False, server_default="0"))
+    with op.batch_alter_table("users") as batch:
+        batch.alter_column("open_task_count", existing_type=sa.Integer(), server_default=None)
+
+    op.execute(
+        """
+        UPDATE users SET open_task_count = (
+            SELECT count(*) FROM tasks
+            WHERE tasks.assigned_to = users.id
+              AND tasks.status != 'completed'
+              AND tasks.deleted_at IS NULL
+        )
+        """
+    )
+    op.create_index(
+        "ix_users_workload",
+        "users",
+        ["company_id", "is_active", "role", "open_task_count", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_workload", table_name="users")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("open_task_count")
@@ -0,0 +1,27 @@
+"""task version for optimistic concurrency
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("tasks", "tasks_archive"):
+        op.add_column(table, sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column("version", existing_type=sa.Integer(), server_default=None)
+
+
+def downgrade() -> None:
+    for table in ("tasks_archive", "tasks"):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("version")
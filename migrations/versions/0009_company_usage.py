@@ -0,0 +1,35 @@
+"""company plans and usage metering
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("companies", sa.Column("plan", sa.String(20), nullable=False, server_default="free"))
+    with op.batch_alter_table("companies") as batch:
+        batch.alter_column("plan", existing_type=sa.String(20), server_default=None)
+
+    op.create_table(
+        "company_usage",
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id"), nullable=False),
+        sa.Column("period", sa.Date(), nullable=False),
+        sa.Column("metric", sa.String(30), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("company_id", "period", "metric"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("company_usage")
+    with op.batch_alter_table("companies") as batch:
+        batch.drop_column("plan")
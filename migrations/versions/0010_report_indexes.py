@@ -0,0 +1,23 @@
+"""created_at indexes for task reports
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_tasks_company_created", "tasks", ["company_id", "created_at"])
+    op.create_index("ix_tasks_archive_company_created", "tasks_archive", ["company_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_archive_company_created", table_name="tasks_archive")
+    op.drop_index("ix_tasks_company_created", table_name="tasks")
@@ -0,0 +1,26 @@
+"""lease on in-flight idempotency claims
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing in-flight rows get no lease, so the next retry may take them over.
+    op.add_column("idempotency_keys", sa.Column("lease_id", sa.String(length=32), nullable=True))
+    op.add_column("idempotency_keys", sa.Column("locked_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("idempotency_keys") as batch:
+        batch.drop_column("locked_until")
+        batch.drop_column("lease_id")
@@ -0,0 +1,38 @@
+"""id as the last key column of ix_tasks_queue
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+_OPEN = "status != 'completed' AND deleted_at IS NULL"
+
+
+def _create(columns: list) -> None:
+    op.create_index(
+        "ix_tasks_queue",
+        "tasks",
+        columns,
+        postgresql_where=sa.text(_OPEN),
+        sqlite_where=sa.text(_OPEN),
+        postgresql_include=["company_id", "title", "status"],
+    )
+
+
+def upgrade() -> None:
+    # The queue sorts by id last; with id in the key the ORDER BY is read straight off the index.
+    op.drop_index("ix_tasks_queue", table_name="tasks")
+    _create(["assigned_to", sa.text("priority DESC"), "due_date", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_queue", table_name="tasks")
+    _create(["assigned_to", sa.text("priority DESC"), "due_date"])
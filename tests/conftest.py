@@ -0,0 +1,155 @@
+"""
+Test setup: a throwaway database migrated with Alembic, outgoing email
+captured in memory, and helpers that create companies with signed-in users.
+
+Every test creates its own companies and users, so tests share one database
+without seeing each other's rows (the same tenant scoping the app relies on).
+"""
+import os
+import re
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# TEST_DATABASE_URL runs the suite against a disposable Postgres database instead;
+# its schema is rebuilt from the migrations on every run.
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or (
+    f"sqlite:///{tempfile.mkdtemp(prefix='voltask-tests-')}/test.db"
+)
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-not-for-production-use")
+os.environ.setdefault("MAIL_USERNAME", "test")
+os.environ.setdefault("MAIL_PASSWORD", "test")
+os.environ.setdefault("MAIL_FROM", "noreply@example.com")
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+from app.core import email
+from app.core.security import hash_password
+from app.db.session import SessionLocal, engine
+from app.models.company import Company
+from app.models.user import User, UserRole
+from app.services import session_service
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = "correct-horse-battery"
+_PASSWORD_HASH = hash_password(PASSWORD)
+
+
+@dataclass
+class Member:
+    id: int
+    company_id: int
+    email: str
+    role: UserRole
+    headers: Dict[str, str]
+    refresh_token: str
+
+
+@dataclass
+class Tenant:
+    company_id: int
+    admin: Member = None
+    members: List[Member] = field(default_factory=list)
+
+    def add(self, role: UserRole = UserRole.employee, is_active: bool = True) -> Member:
+        """A user of this company with an open session (no OTP round trip)."""
+        db = SessionLocal()
+        try:
+            user = User(
+                name=role.value.title(),
+                email=f"{role.value}-{uuid.uuid4().hex[:12]}@example.com",
+                password=_PASSWORD_HASH,
+                role=role,
+                company_id=self.company_id,
+                is_active=is_active,
+            )
+            db.add(user)
+            db.commit()
+            tokens = session_service.start_session(db, user)
+            member = Member(
+                id=user.id,
+                company_id=self.company_id,
+                email=user.email,
+                role=role,
+                headers={"Authorization": f"Bearer {tokens['access_token']}"},
+                refresh_token=tokens["refresh_token"],
+            )
+        finally:
+            db.close()
+        self.members.append(member)
+        return member
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+    yield
+    engine.dispose()
+    command.downgrade(config, "base")
+
+
+@pytest.fixture(scope="session")
+def client(schema):
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def outbox(monkeypatch) -> list:
+    """Emails the app sent during the test, instead of going out over SMTP."""
+    sent = []
+
+    async def capture(message, *args, **kwargs):
+        sent.append(message)
+
+    monkeypatch.setattr(email.fm, "send_message", capture)
+    return sent
+
+
+def otp_sent_to(outbox: list, address: str) -> str:
+    message = next(m for m in reversed(outbox) if any(address in str(r) for r in m.recipients))
+    return re.search(r"\b(\d{6})\b", message.body).group(1)
+
+
+def create_task(client, member: Member, params: Optional[dict] = None, **fields) -> dict:
+    """POST /tasks/ as `member` (title defaults to "task"); asserts 201 and returns the task."""
+    response = client.post("/tasks/", params=params, json={"title": "task", **fields}, headers=member.headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+@pytest.fixture
+def new_tenant():
+    def create(plan: str = "free") -> Tenant:
+        db = SessionLocal()
+        try:
+            company = Company(name=f"Company {uuid.uuid4().hex[:8]}", plan=plan)
+            db.add(company)
+            db.commit()
+            tenant = Tenant(company_id=company.id)
+        finally:
+            db.close()
+        tenant.admin = tenant.add(UserRole.admin)
+        return tenant
+
+    return create
+
+
+@pytest.fixture
+def tenant(new_tenant) -> Tenant:
+    return new_tenant()
+
+
+@pytest.fixture
+def other_tenant(new_tenant) -> Tenant:
+    return new_tenant()
@@ -0,0 +1,75 @@
+import gzip
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware
+
+LARGE = {"items": [{"id": i, "title": f"task {i}"} for i in range(200)]}
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@app.get("/small")
+def small():
+    return {"ok": True}
+
+
+@app.get("/large")
+def large():
+    return LARGE
+
+
+@app.get("/encoded")
+def encoded():
+    body = gzip.compress(json.dumps(LARGE).encode())
+    return Response(body, media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+
+@app.get("/stream")
+def stream(size: int):
+    return StreamingResponse((b"x" * 100 for _ in range(size)), media_type="text/plain")
+
+
+client = TestClient(app)
+
+
+def test_small_responses_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"ok": True}
+
+
+def test_gzip_when_accepted():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(json.dumps(LARGE))
+    assert response.json() == LARGE
+
+    for accept in ("identity", "gzip;q=0"):
+        response = client.get("/large", headers={"Accept-Encoding": accept})
+        assert "content-encoding" not in response.headers, accept
+        assert response.json() == LARGE
+
+
+def test_already_encoded_responses_pass_through():
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == LARGE  # decoded once: not compressed a second time
+
+
+def test_streaming_responses():
+    # Ends below the minimum size: sent as is.
+    response = client.get("/stream?size=3", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"x" * 300
+
+    # Larger streams are compressed chunk by chunk without a Content-Length.
+    response = client.get("/stream?size=50", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"x" * 5000
@@ -0,0 +1,90 @@
+"""
+Changes made through another worker never reach this process's cache. A Core
+statement on its own connection stands in for them: it bypasses the session
+events that invalidate entries.
+"""
+import uuid
+
+from sqlalchemy import event, text
+
+from app.db import entity_cache
+from app.db.session import SessionLocal, engine
+from app.models.user import User, UserRole
+
+
+def test_deactivation_applies_despite_cached_user(client, tenant):
+    employee = tenant.add(UserRole.employee)
+    assert client.get("/tasks/", headers=employee.headers).status_code == 200  # now cached
+
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE users SET is_active = :off WHERE id = :id"), {"off": False, "id": employee.id})
+
+    assert client.get("/tasks/", headers=employee.headers).status_code == 401
+
+
+def test_cache_hit_reads_only_the_uncached_columns(tenant):
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db = SessionLocal()
+    try:
+        entity_cache.get_user(db, tenant.admin.id)
+        db.expunge_all()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            user = entity_cache.get_user(db, tenant.admin.id)
+            assert len(statements) == 1
+            assert "email" not in statements[0].split("FROM")[0]
+            assert (user.email, user.role, user.company_id) == (tenant.admin.email, UserRole.admin, tenant.company_id)
+            assert user.is_active and user.password and user.open_task_count == 0
+            assert len(statements) == 1
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+    finally:
+        db.close()
+
+
+def test_row_deleted_by_another_worker_is_a_miss(tenant):
+    employee = tenant.add(UserRole.employee)
+    db = SessionLocal()
+    try:
+        assert entity_cache.get_user(db, employee.id) is not None  # now cached
+    finally:
+        db.close()
+
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM user_sessions WHERE user_id = :id"), {"id": employee.id})
+        conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": employee.id})
+
+    db = SessionLocal()
+    try:
+        assert entity_cache.get_user(db, employee.id) is None
+        assert entity_cache.get_user_by_email(db, employee.email) is None
+    finally:
+        db.close()
+
+
+def test_unknown_email_is_remembered_until_a_local_commit(tenant):
+    email = f"new-{uuid.uuid4().hex[:12]}@example.com"
+    db = SessionLocal()
+    try:
+        assert entity_cache.get_user_by_email(db, email) is None
+        with engine.begin() as conn:  # registered through another worker
+            conn.execute(
+                text(
+                    "INSERT INTO users (name, email, password, role, company_id, is_active, "
+                    "must_change_password, open_task_count, created_at) "
+                    "VALUES ('New', :email, 'x', 'employee', :cid, :on, :off, 0, CURRENT_TIMESTAMP)"
+                ),
+                {"email": email, "cid": tenant.company_id, "on": True, "off": False},
+            )
+        assert entity_cache.get_user_by_email(db, email) is None
+
+        user = db.query(User).filter(User.email == email).one()
+        user.name = "Renamed"
+        db.commit()
+        assert entity_cache.get_user_by_email(db, email).name == "Renamed"
+    finally:
+        db.close()
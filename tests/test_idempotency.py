@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency import IdempotencyKey
+from app.models.usage import UsageMetric
+from app.services import idempotency_service, metering_service
+
+
+def _post_task(client, member, key: str, title: str = "once"):
+    return client.post("/tasks/", json={"title": title}, headers={**member.headers, "Idempotency-Key": key})
+
+
+def _titles(client, member) -> list:
+    return [t["title"] for t in client.get("/tasks/", headers=member.headers).json()]
+
+
+def _last_key(**changes) -> None:
+    db = SessionLocal()
+    try:
+        record = db.query(IdempotencyKey).order_by(IdempotencyKey.id.desc()).first()
+        for name, value in changes.items():
+            setattr(record, name, value)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_retry_replays_the_stored_response(client, tenant):
+    first = _post_task(client, tenant.admin, "k-replay")
+    retry = _post_task(client, tenant.admin, "k-replay")
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert _titles(client, tenant.admin) == ["once"]
+
+    assert _post_task(client, tenant.admin, "k-replay", title="other").status_code == 422
+
+
+def test_retry_waits_out_a_live_claim(client, tenant, monkeypatch):
+    assert _post_task(client, tenant.admin, "k-live").status_code == 201
+    # Still running elsewhere: no stored response, lease held by another worker.
+    _last_key(status_code=None, lease_id="other-worker", locked_until=datetime.utcnow() + timedelta(minutes=1))
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+
+    assert _post_task(client, tenant.admin, "k-live").status_code == 409
+
+
+def test_retry_takes_over_a_claim_whose_worker_died(client, tenant):
+    assert _post_task(client, tenant.admin, "k-dead").status_code == 201
+    _last_key(status_code=None, lease_id="dead-worker", locked_until=datetime.utcnow() - timedelta(seconds=1))
+
+    retry = _post_task(client, tenant.admin, "k-dead")
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+    assert _post_task(client, tenant.admin, "k-dead").headers["Idempotent-Replayed"] == "true"
+
+
+def test_transient_refusals_are_not_replayed(client, tenant, monkeypatch):
+    limits = {**metering_service.PLAN_LIMITS["free"], UsageMetric.tasks_created: 0}
+    monkeypatch.setitem(metering_service.PLAN_LIMITS, "free", limits)
+    assert _post_task(client, tenant.admin, "k-quota").status_code == 429
+
+    monkeypatch.undo()
+    retry = _post_task(client, tenant.admin, "k-quota")
+    assert retry.status_code == 201
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_a_lost_lease_cannot_complete_or_release():
+    db = SessionLocal()
+    try:
+        assert idempotency_service.claim(db, "s" * 64, "r", "lease-a")[0] == idempotency_service.CLAIMED
+        assert idempotency_service.claim(db, "s" * 64, "r", "lease-b")[0] == idempotency_service.IN_FLIGHT
+        assert idempotency_service.extend(db, "s" * 64, "lease-a")
+
+        db.query(IdempotencyKey).filter(IdempotencyKey.scope_hash == "s" * 64).update(
+            {"locked_until": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+        assert idempotency_service.claim(db, "s" * 64, "r", "lease-b")[0] == idempotency_service.CLAIMED
+
+        assert not idempotency_service.extend(db, "s" * 64, "lease-a")
+        idempotency_service.release(db, "s" * 64, "lease-a")
+        idempotency_service.complete(db, "s" * 64, "lease-a", 201, "application/json", b"stale")
+        assert idempotency_service.lookup(db, "s" * 64).status_code is None
+
+        idempotency_service.complete(db, "s" * 64, "lease-b", 201, "application/json", b"{}")
+        outcome, record = idempotency_service.claim(db, "s" * 64, "r", "lease-c")
+        assert (outcome, record.response_body) == (idempotency_service.COMPLETED, b"{}")
+    finally:
+        db.close()
+
+
+def test_running_request_keeps_extending_its_lease(monkeypatch):
+    import asyncio
+
+    from app.middleware.idempotency import IdempotencyMiddleware
+
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LEASE_SECONDS", 0.3)
+    db = SessionLocal()
+    try:
+        idempotency_service.claim(db, "h" * 64, "r", "lease-a")
+        initial = idempotency_service.lookup(db, "h" * 64).locked_until
+
+        async def run_for(seconds):
+            heartbeat = asyncio.ensure_future(IdempotencyMiddleware._keep_lease("h" * 64, "lease-a"))
+            await asyncio.sleep(seconds)
+            heartbeat.cancel()
+
+        asyncio.run(run_for(0.5))
+        db.expire_all()
+        assert idempotency_service.lookup(db, "h" * 64).locked_until > initial
+    finally:
+        db.close()
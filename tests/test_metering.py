@@ -0,0 +1,84 @@
+import pytest
+from fastapi import HTTPException
+
+from app.db.session import SessionLocal
+from app.models.usage import CompanyUsage, UsageMetric
+from app.services import metering_service
+
+
+def _stored(company_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(
+            db.query(CompanyUsage.metric, CompanyUsage.value).filter(CompanyUsage.company_id == company_id)
+        )
+    finally:
+        db.close()
+
+
+def _flush() -> None:
+    db = SessionLocal()
+    try:
+        metering_service.flush(db)
+    finally:
+        db.close()
+
+
+def test_record_and_flush_add_up(tenant):
+    company_id = tenant.company_id
+    _flush()  # anything counted while the fixture signed in
+
+    metering_service.record(company_id, UsageMetric.tasks_created, 2)
+    metering_service.record(company_id, UsageMetric.tasks_created)
+    db = SessionLocal()
+    try:
+        _, _, usage = metering_service.get_usage(db, company_id)
+        assert usage["tasks_created"] == 3  # pending counts are visible before the flush
+        assert metering_service.flush(db) >= 1
+        assert metering_service.flush(db) == 0
+
+        metering_service.record(company_id, UsageMetric.tasks_created)
+        metering_service.flush(db)
+        assert _stored(company_id)["tasks_created"] == 4
+        assert metering_service.get_usage(db, company_id)[2]["tasks_created"] == 4
+    finally:
+        db.close()
+
+
+def test_check_quota_allows_up_to_the_limit(tenant, monkeypatch):
+    monkeypatch.setitem(metering_service.PLAN_LIMITS["free"], UsageMetric.users_invited, 2)
+    db = SessionLocal()
+    try:
+        metering_service.record(tenant.company_id, UsageMetric.users_invited)
+        metering_service.check_quota(db, tenant.company_id, UsageMetric.users_invited)
+        metering_service.record(tenant.company_id, UsageMetric.users_invited)
+        with pytest.raises(HTTPException) as over:
+            metering_service.check_quota(db, tenant.company_id, UsageMetric.users_invited)
+        assert over.value.status_code == 429
+        metering_service.check_quota(db, tenant.company_id, UsageMetric.users_invited, amount=0)
+    finally:
+        db.close()
+
+
+def test_over_api_call_quota_only_blocks_metered_routes(client, tenant, monkeypatch):
+    headers = tenant.admin.headers
+    assert client.get("/tasks/", headers=headers).status_code == 200
+    db = SessionLocal()
+    try:
+        used = metering_service.get_usage(db, tenant.company_id)[2]["api_calls"]
+    finally:
+        db.close()
+    monkeypatch.setitem(metering_service.PLAN_LIMITS["free"], UsageMetric.api_calls, used + 1)
+
+    assert client.get("/tasks/", headers=headers).status_code == 200  # the last allowed call
+    response = client.get("/tasks/", headers=headers)
+    assert response.status_code == 429
+    assert "api_calls" in response.json()["detail"]
+    assert client.get("/reports/tasks", headers=headers).status_code == 429
+
+    usage = client.get("/companies/me/usage", headers=headers)
+    assert usage.status_code == 200
+    assert usage.json()["usage"]["api_calls"]["limit"] == used + 1
+    assert usage.json()["usage"]["api_calls"]["used"] >= used + 3
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 204
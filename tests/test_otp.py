@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.otp import OTPRecord
+from app.models.user import UserRole
+
+from tests.conftest import PASSWORD, otp_sent_to
+
+
+def _emails_to(outbox: list, address: str) -> int:
+    return sum(any(address in str(r) for r in m.recipients) for m in outbox)
+
+
+def _login(client, email: str) -> None:
+    assert client.post("/auth/login", json={"email": email, "password": PASSWORD}).status_code == 200
+
+
+def _verify(client, email: str, otp: str) -> int:
+    return client.post("/auth/verify-login", json={"email": email, "otp": otp}).status_code
+
+
+def test_repeated_requests_send_one_email_with_a_working_code(client, outbox, tenant):
+    member = tenant.add(UserRole.employee)
+    for _ in range(3):
+        _login(client, member.email)
+
+    assert _emails_to(outbox, member.email) == 1
+    assert _verify(client, member.email, otp_sent_to(outbox, member.email)) == 200
+
+
+def test_same_code_resent_after_cooldown_new_code_after_reuse_window(client, outbox, tenant, monkeypatch):
+    member = tenant.add(UserRole.employee)
+    monkeypatch.setattr(settings, "OTP_RESEND_COOLDOWN_SECONDS", 0)
+    _login(client, member.email)
+    first = otp_sent_to(outbox, member.email)
+    _login(client, member.email)
+    assert _emails_to(outbox, member.email) == 2
+    assert otp_sent_to(outbox, member.email) == first
+
+    monkeypatch.setattr(settings, "OTP_REUSE_SECONDS", 0)
+    _login(client, member.email)
+    second = otp_sent_to(outbox, member.email)
+    assert second != first
+    assert _verify(client, member.email, first) == 400  # replaced by the new code
+    assert _verify(client, member.email, second) == 200
+
+
+def test_expired_code_is_never_reused(client, outbox, tenant, monkeypatch):
+    member = tenant.add(UserRole.employee)
+    monkeypatch.setattr(settings, "OTP_REUSE_SECONDS", 3600)
+    monkeypatch.setattr(settings, "OTP_RESEND_COOLDOWN_SECONDS", 0)
+    _login(client, member.email)
+    stale = otp_sent_to(outbox, member.email)
+
+    db = SessionLocal()
+    try:
+        db.query(OTPRecord).filter(OTPRecord.user_id == member.id).update(
+            {"created_at": datetime.utcnow() - timedelta(minutes=6)}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    _login(client, member.email)
+    fresh = otp_sent_to(outbox, member.email)
+    assert fresh != stale
+    assert _verify(client, member.email, fresh) == 200
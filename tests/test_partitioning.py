@@ -0,0 +1,89 @@
+"""Postgres only: run with TEST_DATABASE_URL pointing at a disposable Postgres database."""
+import pytest
+from sqlalchemy import event, text
+
+from app.db import partitioning
+from app.db.session import engine
+
+from tests.conftest import create_task
+
+pytestmark = pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="tasks partitioning is Postgres-only"
+)
+
+
+def _create_tasks(client, member, count: int) -> list:
+    return [create_task(client, member, title=f"t{i}")["id"] for i in range(count)]
+
+
+def _rows_in(table: str, company_id: int) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f"SELECT count(*) FROM {table} WHERE company_id = :cid"), {"cid": company_id}
+        ).scalar()
+
+
+def test_partition_move_tenant_and_unpartition(client, tenant, other_tenant):
+    hot = _create_tasks(client, tenant.admin, 3)
+    cold = _create_tasks(client, other_tenant.admin, 2)
+
+    with engine.begin() as conn:
+        partitioning.partition_tasks(conn, 4)
+    try:
+        with engine.connect() as conn:
+            assert partitioning.is_partitioned(conn)
+        assert _rows_in(partitioning.DEFAULT_PARTITION, tenant.company_id) == 3
+
+        # Writes keep working and land in the partitioned table with fresh ids.
+        hot += _create_tasks(client, tenant.admin, 1)
+        assert hot[-1] > max(hot[:-1] + cold)
+
+        assert partitioning.move_tenant(engine, tenant.company_id, batch_size=2) == 4
+        partition = f"tasks_c{tenant.company_id}"
+        assert _rows_in(partition, tenant.company_id) == 4
+        assert _rows_in(partitioning.DEFAULT_PARTITION, tenant.company_id) == 0
+
+        status = partitioning.partition_status(engine)
+        assert partition in {p["name"] for p in status["partitions"]}
+
+        listed = client.get("/tasks/?limit=50", headers=tenant.admin.headers).json()
+        assert [t["id"] for t in listed] == hot
+        updated = client.patch(f"/tasks/{hot[0]}", json={"status": "completed"}, headers=tenant.admin.headers)
+        assert updated.status_code == 200, updated.text
+        listed = client.get("/tasks/?limit=50", headers=other_tenant.admin.headers).json()
+        assert [t["id"] for t in listed] == cold
+    finally:
+        with engine.begin() as conn:
+            partitioning.unpartition_tasks(conn)
+
+    with engine.connect() as conn:
+        assert not partitioning.is_partitioned(conn)
+    assert [t["id"] for t in client.get("/tasks/?limit=50", headers=tenant.admin.headers).json()] == hot
+    assert _create_tasks(client, tenant.admin, 1)[0] > max(hot + cold)
+
+
+def test_queue_is_an_index_only_scan(client, tenant):
+    for i in range(20):
+        create_task(client, tenant.admin, title=f"q{i}", assigned_to=tenant.admin.id)
+
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM tasks" in statement and "ORDER BY" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.get("/tasks/queue", headers=tenant.admin.headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = statements[-1]
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM ANALYZE tasks")
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        plan = "\n".join(
+            row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        )
+    assert "Index Only Scan using ix_tasks_queue" in plan, plan
+    assert "Sort" not in plan, plan
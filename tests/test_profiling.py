@@ -0,0 +1,57 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.middleware import profiling
+
+
+def _bearer(role: str, company_id: int = 7) -> dict:
+    token = create_access_token({"sub": "1", "company_id": company_id, "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _scope(headers: dict) -> dict:
+    return {
+        "type": "http",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    }
+
+
+def test_trigger_decodes_the_token_only_when_profiling(monkeypatch):
+    decoded = []
+    real_decode = profiling.decode_access_token
+    monkeypatch.setattr(profiling, "decode_access_token", lambda t: decoded.append(t) or real_decode(t))
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+
+    assert profiling._trigger(_scope(_bearer("admin"))) is None
+    assert decoded == []
+
+    assert profiling._trigger(_scope({**_bearer("employee"), "X-Profile": "1"})) is None
+    assert profiling._trigger(_scope({**_bearer("admin"), "X-Profile": "1"})) == ("header", (7, "1"))
+    assert len(decoded) == 2
+
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+    assert profiling._trigger(_scope(_bearer("employee"))) == ("sample", (7, "1"))
+
+
+def test_admin_header_records_a_profile(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILING_TRACEMALLOC", False)
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        return {"total": sum(range(10_000))}
+
+    with TestClient(app) as client:
+        assert client.get("/work", headers=_bearer("admin", company_id=991)).status_code == 200
+        assert profiling.list_profiles(991) == []
+        response = client.get("/work", headers={**_bearer("admin", company_id=991), "X-Profile": "1"})
+        assert response.status_code == 200
+
+    [profile] = profiling.list_profiles(991)
+    assert (profile["trigger"], profile["path"], profile["status_code"]) == ("header", "/work", 200)
+    assert profile["loop_profiled"]
+    assert any("work" in row["function"] for row in profile["functions"])
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.models.task import Task, TaskArchive, TaskStatus
+from app.models.task_event import TaskEvent, TaskEventType
+from app.models.user import UserRole
+
+from tests.conftest import create_task
+
+RANGE = "since=2026-01-01T00:00:00&until=2026-02-01T00:00:00"
+
+
+def _dated_task(client, tenant, assignee, created_at, completed_at=None, completion_event=True) -> int:
+    """A task backdated to `created_at` and, if given, completed at `completed_at`."""
+    headers = tenant.admin.headers
+    task = create_task(client, tenant.admin, assigned_to=assignee)
+    if completed_at is not None:
+        client.patch(f"/tasks/{task['id']}", json={"status": "completed"}, headers=headers)
+
+    db = SessionLocal()
+    try:
+        db.query(Task).filter(Task.id == task["id"]).update(
+            {"created_at": created_at, "updated_at": completed_at or created_at}
+        )
+        events = db.query(TaskEvent).filter(
+            TaskEvent.task_id == task["id"], TaskEvent.event_type == TaskEventType.status_changed
+        )
+        if completion_event:
+            events.update({"created_at": completed_at})
+        else:
+            events.delete()
+        db.commit()
+    finally:
+        db.close()
+    return task["id"]
+
+
+def _report(client, tenant, bucket: str) -> list:
+    response = client.get(f"/reports/tasks?bucket={bucket}&{RANGE}", headers=tenant.admin.headers)
+    assert response.status_code == 200, response.text
+    return [
+        (r["period"], r["assigned_to"], r["created"], r["created_by_status"], r["completed"], r["median_hours_to_complete"])
+        for r in response.json()["rows"]
+    ]
+
+
+def test_report_aggregates(client, tenant):
+    a = tenant.add(UserRole.employee).id
+    # 4h, 24h (completed the next day), and 10h with no history: falls back to updated_at.
+    _dated_task(client, tenant, a, datetime(2026, 1, 5, 10), datetime(2026, 1, 5, 14))
+    _dated_task(client, tenant, a, datetime(2026, 1, 5, 8), datetime(2026, 1, 6, 8))
+    _dated_task(client, tenant, a, datetime(2026, 1, 5, 8), datetime(2026, 1, 5, 18), completion_event=False)
+    _dated_task(client, tenant, None, datetime(2026, 1, 6, 9))
+    deleted = _dated_task(client, tenant, a, datetime(2026, 1, 6, 9))
+    client.delete(f"/tasks/{deleted}", headers=tenant.admin.headers)
+    _dated_task(client, tenant, a, datetime(2025, 12, 31, 9))  # before the range
+
+    db = SessionLocal()
+    try:
+        db.add(TaskArchive(
+            id=10**8 + tenant.company_id, title="archived", status=TaskStatus.completed, priority=1,
+            company_id=tenant.company_id, created_by=tenant.admin.id, assigned_to=a,
+            created_at=datetime(2026, 1, 7), updated_at=datetime(2026, 1, 7, 2), version=2,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    assert _report(client, tenant, "day") == [
+        ("2026-01-05", a, 3, {"completed": 3}, 2, 7.0),
+        ("2026-01-06", None, 1, {"pending": 1}, 0, None),
+        ("2026-01-06", a, 0, {}, 1, 24.0),
+        ("2026-01-07", a, 1, {"completed": 1}, 1, 2.0),
+    ]
+    # 2026-01-05 is a Monday: one weekly bucket.
+    assert _report(client, tenant, "week") == [
+        ("2026-01-05", None, 1, {"pending": 1}, 0, None),
+        ("2026-01-05", a, 4, {"completed": 4}, 4, 7.0),
+    ]
+    assert _report(client, tenant, "month") == [
+        ("2026-01-01", None, 1, {"pending": 1}, 0, None),
+        ("2026-01-01", a, 4, {"completed": 4}, 4, 7.0),
+    ]
+
+
+def test_report_range_is_validated(client, tenant):
+    headers = tenant.admin.headers
+    assert client.get("/reports/tasks?since=2026-02-01T00:00:00&until=2026-01-01T00:00:00", headers=headers).status_code == 400
+    assert client.get("/reports/tasks?since=2020-01-01T00:00:00&until=2026-01-01T00:00:00", headers=headers).status_code == 400
+    employee = tenant.add(UserRole.employee)
+    assert client.get("/reports/tasks", headers=employee.headers).status_code == 403
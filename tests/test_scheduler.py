@@ -0,0 +1,86 @@
+import asyncio
+import sys
+
+import pytest
+
+from app.db.session import engine
+from app.jobs import maintenance, scheduler
+from app.jobs.scheduler import LeaderLock, Scheduler
+
+postgres_only = pytest.mark.skipif(
+    engine.dialect.name != "postgresql", reason="leader election uses Postgres advisory locks"
+)
+
+
+@postgres_only
+def test_only_one_runner_becomes_leader():
+    runners = [LeaderLock(engine) for _ in range(3)]
+    try:
+        assert [runner.acquire() for runner in runners] == [True, False, False]
+        assert [runner.acquire() for runner in runners] == [True, False, False]
+    finally:
+        for runner in runners:
+            runner.release()
+
+
+@postgres_only
+def test_only_the_leader_keeps_a_connection():
+    leader, follower = LeaderLock(engine), LeaderLock(engine)
+    try:
+        assert leader.acquire()
+        checked_out = engine.pool.checkedout()
+
+        assert not follower.acquire()
+        assert follower._conn is None
+        assert engine.pool.checkedout() == checked_out
+
+        assert leader.acquire()  # still the leader, on the same connection
+        assert engine.pool.checkedout() == checked_out
+
+        leader.release()
+        assert follower.acquire()
+    finally:
+        leader.release()
+        follower.release()
+
+
+def test_every_scheduled_job_exists():
+    assert set(scheduler.SCHEDULE) == set(maintenance.JOBS)
+
+
+@pytest.mark.parametrize("job", sorted(maintenance.JOBS))
+def test_job_runs_from_the_cli(job, schema, monkeypatch, caplog):
+    monkeypatch.setattr(sys, "argv", ["app.jobs.maintenance", job])
+    monkeypatch.setattr(maintenance.logger, "disabled", False)  # alembic's fileConfig disables it
+    caplog.set_level("INFO", logger=maintenance.__name__)
+    maintenance.main()
+    assert f"{job}: " in caplog.text
+
+
+def test_cli_rejects_unknown_jobs(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["app.jobs.maintenance", "no-such-job"])
+    with pytest.raises(SystemExit):
+        maintenance.main()
+
+
+def test_tick_runs_due_jobs_once_per_interval(monkeypatch):
+    runs = []
+
+    def job(deadline=None):
+        runs.append("sync")
+        return 1
+
+    async def async_job(deadline=None):
+        runs.append("async")
+        return 0
+
+    monkeypatch.setattr(scheduler, "SCHEDULE", {"sync": 60, "async": 60})
+    monkeypatch.setattr(maintenance, "JOBS", {"sync": job, "async": async_job})
+
+    async def two_ticks():
+        runner = Scheduler(engine)
+        await runner.tick()
+        await runner.tick()
+
+    asyncio.run(two_ticks())
+    assert runs == ["sync", "async"]
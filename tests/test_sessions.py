@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+
+from app.db.session import SessionLocal
+from app.jobs import maintenance
+from app.models.session import UserSession
+from app.models.user import UserRole
+
+from tests.conftest import PASSWORD, otp_sent_to
+
+
+def _sign_in(client, outbox, email: str, password: str = PASSWORD) -> dict:
+    response = client.post("/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    response = client.post("/auth/verify-login", json={"email": email, "otp": otp_sent_to(outbox, email)})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+def test_register_verify_and_login(client, outbox):
+    email = "founder-register@example.com"
+    response = client.post("/auth/register", json={
+        "company_name": "Acme", "name": "Founder", "email": email, "password": PASSWORD,
+    })
+    assert response.status_code == 201, response.text
+    assert client.post("/auth/login", json={"email": email, "password": PASSWORD}).status_code == 403
+
+    response = client.post("/auth/verify-email", json={"email": email, "otp": otp_sent_to(outbox, email)})
+    assert response.status_code == 200, response.text
+    tokens = _sign_in(client, outbox, email)
+    me = client.get("/auth/me", headers=_bearer(tokens)).json()
+    assert me["email"] == email and me["role"] == "admin"
+
+
+def test_refresh_rotates_the_token(client, tenant):
+    member = tenant.admin
+    first = client.post("/auth/refresh", json={"refresh_token": member.refresh_token})
+    assert first.status_code == 200, first.text
+    rotated = first.json()["refresh_token"]
+    assert rotated != member.refresh_token
+
+    # The old token is spent; the new one works exactly once more.
+    assert client.post("/auth/refresh", json={"refresh_token": member.refresh_token}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": rotated}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": rotated}).status_code == 401
+
+
+def test_change_password_revokes_other_sessions(client, outbox, tenant):
+    member = tenant.add(UserRole.employee)
+    laptop = _sign_in(client, outbox, member.email)
+    phone = member  # session opened by the fixture
+
+    response = client.put(
+        "/auth/change-password",
+        json={"old_password": PASSWORD, "new_password": "a-brand-new-password"},
+        headers=_bearer(laptop),
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.post("/auth/refresh", json={"refresh_token": phone.refresh_token}).status_code == 401
+    assert client.get("/auth/me", headers=phone.headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": laptop["refresh_token"]}).status_code == 200
+    sessions = client.get("/auth/sessions", headers=_bearer(laptop)).json()
+    assert [s["current"] for s in sessions] == [True]
+
+
+def test_logout_is_idempotent(client, tenant):
+    member = tenant.add(UserRole.employee)
+    assert client.get("/auth/me", headers=member.headers).status_code == 200
+    assert client.post("/auth/logout", headers=member.headers).status_code == 204
+    assert client.post("/auth/logout", headers=member.headers).status_code == 204
+    assert client.post("/auth/refresh", json={"refresh_token": member.refresh_token}).status_code == 401
+    assert client.get("/auth/me", headers=member.headers).status_code == 401
+
+
+def test_revoked_session_ends_its_access_token(client, outbox, tenant):
+    member = tenant.add(UserRole.employee)
+    laptop = _sign_in(client, outbox, member.email)
+    phone_session = next(s["id"] for s in client.get("/auth/sessions", headers=_bearer(laptop)).json() if not s["current"])
+
+    assert client.delete(f"/auth/sessions/{phone_session}", headers=_bearer(laptop)).status_code == 204
+    assert client.get("/auth/me", headers=member.headers).status_code == 401
+    assert client.get("/auth/me", headers=_bearer(laptop)).status_code == 200
+
+
+def test_purge_removes_expired_and_revoked_sessions(client, tenant):
+    live, revoked, expired = (tenant.add(UserRole.employee) for _ in range(3))
+    client.post("/auth/logout", headers=revoked.headers)
+    db = SessionLocal()
+    try:
+        db.query(UserSession).filter(UserSession.user_id == expired.id).update(
+            {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    assert maintenance.purge_sessions() >= 2
+
+    db = SessionLocal()
+    try:
+        remaining = {
+            user_id for (user_id,) in db.query(UserSession.user_id).filter(
+                UserSession.user_id.in_([live.id, revoked.id, expired.id])
+            )
+        }
+    finally:
+        db.close()
+    assert remaining == {live.id}
+    assert client.get("/auth/me", headers=live.headers).status_code == 200
+
+
+def test_revoking_an_unknown_session_is_404(client, tenant):
+    assert client.delete("/auth/sessions/999999", headers=tenant.admin.headers).status_code == 404
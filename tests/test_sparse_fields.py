@@ -0,0 +1,21 @@
+from tests.conftest import create_task
+
+
+def test_fields_returns_only_requested_keys(client, tenant):
+    headers = tenant.admin.headers
+    create_task(client, tenant.admin, title="sparse", description="long text")
+
+    for url in ("/tasks/?fields=title,status", "/tasks/?include_archived=true&fields=title,status"):
+        [row] = client.get(url, headers=headers).json()
+        assert set(row) == {"id", "title", "status"}, url
+        assert row["title"] == "sparse"
+
+    users = client.get("/users/?fields=email", headers=headers).json()
+    assert [set(u) for u in users] == [{"id", "email"}]
+
+
+def test_unknown_fields_are_rejected(client, tenant):
+    response = client.get("/tasks/?fields=title,password", headers=tenant.admin.headers)
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+    assert client.get("/users/?fields=password", headers=tenant.admin.headers).status_code == 400
@@ -0,0 +1,68 @@
+import functools
+import time
+from datetime import datetime
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.models.task_event import TaskEvent, TaskEventType
+from app.services import task_event_service
+
+from tests.conftest import create_task
+
+
+def test_changes_are_recorded_in_history(client, tenant):
+    task = create_task(client, tenant.admin)
+    client.patch(f"/tasks/{task['id']}", json={"status": "in-progress", "title": "renamed"}, headers=tenant.admin.headers)
+    client.patch(f"/tasks/{task['id']}/assign", json={"assigned_to": tenant.admin.id}, headers=tenant.admin.headers)
+
+    events = client.get(f"/tasks/{task['id']}/history", headers=tenant.admin.headers).json()
+    assert [e["event_type"] for e in events] == ["assigned", "updated", "status_changed", "created"]
+    status_change = events[2]
+    assert (status_change["from_value"], status_change["to_value"]) == ("pending", "in-progress")
+    assert events[1]["changes"] == {"title": ["task", "renamed"]}
+
+
+@pytest.mark.parametrize("field", ["status", "title", "priority"])
+def test_null_for_required_field_is_rejected(client, tenant, field):
+    task = create_task(client, tenant.admin)
+    response = client.patch(f"/tasks/{task['id']}", json={field: None}, headers=tenant.admin.headers)
+    assert response.status_code == 422
+
+    history = client.get(f"/tasks/{task['id']}/history", headers=tenant.admin.headers).json()
+    assert [e["event_type"] for e in history] == ["created"]
+
+
+def test_nullable_fields_can_be_cleared(client, tenant):
+    task = create_task(client, tenant.admin, description="notes", due_date="2030-01-01T00:00:00")
+    response = client.patch(
+        f"/tasks/{task['id']}", json={"description": None, "due_date": None}, headers=tenant.admin.headers
+    )
+    assert response.status_code == 200, response.text
+    assert (response.json()["description"], response.json()["due_date"]) == (None, None)
+
+
+def test_prune_stops_at_the_deadline_across_passes(client, tenant):
+    task = create_task(client, tenant.admin)
+    client.patch(f"/tasks/{task['id']}", json={"title": "renamed"}, headers=tenant.admin.headers)
+    db = SessionLocal()
+    try:
+        events = db.query(TaskEvent).filter(TaskEvent.task_id == task["id"])
+        events.filter(TaskEvent.event_type == TaskEventType.created).update({"created_at": datetime(2000, 1, 1)})
+        events.filter(TaskEvent.event_type == TaskEventType.updated).update({"created_at": datetime(2015, 1, 1)})
+        db.commit()
+
+        # Cutoffs that only these two events are old enough for.
+        prune = functools.partial(
+            task_event_service.prune_task_events, db,
+            compact_after_days=(datetime.utcnow() - datetime(2018, 1, 1)).days,
+            retain_days=(datetime.utcnow() - datetime(2013, 1, 1)).days,
+            batch_size=1,
+        )
+        # Out of budget after the first retention batch: the compaction pass must not start.
+        assert prune(deadline=time.monotonic() - 1) == 1
+        assert [e.event_type for e in events] == [TaskEventType.updated]
+        assert prune() == 1
+        assert events.count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,120 @@
+import pytest
+from fastapi import HTTPException
+
+from app.db.session import SessionLocal
+from app.models.task import Task
+from app.models.user import UserRole
+from app.services import task_service
+
+from tests.conftest import create_task
+
+
+def test_list_pages_are_stable_and_match_archived_order(client, tenant):
+    ids = [create_task(client, tenant.admin, title=f"t{i}")["id"] for i in range(5)]
+    headers = tenant.admin.headers
+
+    pages = [client.get(f"/tasks/?skip={skip}&limit=2", headers=headers).json() for skip in (0, 2, 4)]
+    assert [t["id"] for page in pages for t in page] == ids
+    with_archived = client.get("/tasks/?include_archived=true&limit=5", headers=headers).json()
+    assert [t["id"] for t in with_archived] == ids
+
+
+def test_queue_orders_by_priority_due_date_then_id(client, tenant):
+    me = tenant.admin
+    low = create_task(client, me, assigned_to=me.id, priority=0)
+    later = create_task(client, me, assigned_to=me.id, priority=2, due_date="2030-01-02T00:00:00")
+    undated = create_task(client, me, assigned_to=me.id, priority=2)
+    sooner = create_task(client, me, assigned_to=me.id, priority=2, due_date="2030-01-01T00:00:00")
+    tie = create_task(client, me, assigned_to=me.id, priority=2, due_date="2030-01-01T00:00:00")
+    done = create_task(client, me, assigned_to=me.id, priority=3)
+    client.patch(f"/tasks/{done['id']}", json={"status": "completed"}, headers=me.headers)
+
+    rows = client.get("/tasks/queue", headers=me.headers).json()
+    assert [r["id"] for r in rows] == [sooner["id"], tie["id"], later["id"], undated["id"], low["id"]]
+    assert set(rows[0]) == {"id", "title", "status", "priority", "due_date"}
+
+
+def test_create_rejects_assignee_outside_company(client, tenant, other_tenant):
+    for assignee in (other_tenant.admin.id, 10**9):
+        response = client.post(
+            "/tasks/", json={"title": "x", "assigned_to": assignee}, headers=tenant.admin.headers
+        )
+        assert response.status_code == 404
+    assert client.get("/tasks/", headers=tenant.admin.headers).json() == []
+
+
+def _open_counts(client, tenant) -> dict:
+    rows = client.get("/users/workload?include_inactive=true", headers=tenant.admin.headers).json()
+    return {row["id"]: row["open_task_count"] for row in rows}
+
+
+def test_auto_assign_spreads_load_and_counts_stay_exact(client, tenant):
+    a, b = tenant.add(UserRole.employee), tenant.add(UserRole.employee)
+    inactive = tenant.add(UserRole.employee, is_active=False)
+    headers = tenant.admin.headers
+
+    assignees = [create_task(client, tenant.admin, params={"assign": "auto"}, title=f"auto{i}") for i in range(4)]
+    assert sorted(t["assigned_to"] for t in assignees) == sorted([a.id, a.id, b.id, b.id])
+    assert _open_counts(client, tenant) == {tenant.admin.id: 0, a.id: 2, b.id: 2, inactive.id: 0}
+
+    first, second = (t for t in assignees if t["assigned_to"] == a.id)
+    client.patch(f"/tasks/{first['id']}", json={"status": "completed"}, headers=headers)
+    client.delete(f"/tasks/{second['id']}", headers=headers)
+    moved = next(t for t in assignees if t["assigned_to"] == b.id)
+    client.patch(f"/tasks/{moved['id']}/assign", json={"assigned_to": tenant.admin.id}, headers=headers)
+    assert _open_counts(client, tenant) == {tenant.admin.id: 1, a.id: 0, b.id: 1, inactive.id: 0}
+
+    # a is now the least loaded employee again
+    assert create_task(client, tenant.admin, params={"assign": "auto"})["assigned_to"] == a.id
+
+
+def test_if_match_rejects_stale_versions(client, tenant):
+    headers = tenant.admin.headers
+    task = create_task(client, tenant.admin)
+    assert task["version"] == 1
+
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "a"}, headers={**headers, "If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    stale = client.patch(f"/tasks/{task['id']}", json={"title": "b"}, headers={**headers, "If-Match": '"1"'})
+    assert stale.status_code == 409
+    assert client.get("/tasks/", headers=headers).json()[0]["title"] == "a"
+
+    # If-Match compares strongly: a weak tag never matches, even for the current version.
+    weak = client.patch(f"/tasks/{task['id']}", json={"title": "c"}, headers={**headers, "If-Match": 'W/"2"'})
+    assert weak.status_code == 409
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "c"}, headers={**headers, "If-Match": 'W/"2", "1", "2"'})
+    assert response.status_code == 200
+    assert client.patch(f"/tasks/{task['id']}", json={"title": "d"}, headers={**headers, "If-Match": "*"}).status_code == 200
+    assert client.patch(f"/tasks/{task['id']}", json={"title": "e"}, headers={**headers, "If-Match": "v2"}).status_code == 400
+
+
+def test_forbidden_edit_is_403_before_the_version_check(client, tenant):
+    employee = tenant.add(UserRole.employee)
+    task = create_task(client, tenant.admin)
+
+    response = client.patch(
+        f"/tasks/{task['id']}", json={"title": "x"}, headers={**employee.headers, "If-Match": '"99"'}
+    )
+    assert response.status_code == 403
+    assert "version" not in response.text
+
+
+def test_racing_write_without_if_match_is_a_conflict(client, tenant):
+    task = create_task(client, tenant.admin)
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        mine = first.query(Task).filter(Task.id == task["id"]).one()
+        theirs = second.query(Task).filter(Task.id == task["id"]).one()
+        theirs.title = "theirs"
+        second.commit()
+
+        mine.title = "mine"
+        with pytest.raises(HTTPException) as conflict:
+            task_service._commit_versioned(first)
+        assert conflict.value.status_code == 409
+    finally:
+        first.close()
+        second.close()
+    assert client.get("/tasks/", headers=tenant.admin.headers).json()[0]["title"] == "theirs"
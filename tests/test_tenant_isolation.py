@@ -0,0 +1,119 @@
+"""
+Company isolation is enforced by the session (app/db/tenant.py), not by filters
+in each query. These tests pin it down for every read and write path, so a new
+query that bypasses the scoping fails here instead of leaking.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from app.db.session import SessionLocal
+from app.db.tenant import bind_tenant
+from app.models.task import Task, TaskArchive, TaskStatus
+from app.models.user import User, UserRole
+
+from tests.conftest import create_task
+
+
+def _archive(company_id: int, created_by: int, title: str) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        db.add(TaskArchive(
+            id=db.execute(text("SELECT COALESCE(MAX(id), 0) + 100000 FROM tasks_archive")).scalar(),
+            title=title, status=TaskStatus.completed, priority=1, company_id=company_id,
+            created_by=created_by, created_at=now, updated_at=now, version=1,
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_task_lists_only_show_own_company(client, tenant, other_tenant):
+    mine = create_task(client, tenant.admin, title="mine")
+    theirs = create_task(client, other_tenant.admin, title="theirs")
+    _archive(other_tenant.company_id, other_tenant.admin.id, "their archived")
+
+    for url in (
+        "/tasks/",
+        "/tasks/?fields=id,title",
+        "/tasks/?include_archived=true",
+        "/tasks/?include_archived=true&fields=id,title",
+    ):
+        rows = client.get(url, headers=tenant.admin.headers).json()
+        assert [row["id"] for row in rows] == [mine["id"]], url
+        assert theirs["id"] not in {row["id"] for row in rows}
+
+
+def test_queue_only_shows_own_company(client, tenant, other_tenant):
+    create_task(client, other_tenant.admin, assigned_to=other_tenant.admin.id)
+    mine = create_task(client, tenant.admin, assigned_to=tenant.admin.id)
+
+    rows = client.get("/tasks/queue", headers=tenant.admin.headers).json()
+    assert [row["id"] for row in rows] == [mine["id"]]
+
+
+def test_cannot_touch_other_company_tasks(client, tenant, other_tenant):
+    theirs = create_task(client, other_tenant.admin)
+    headers = tenant.admin.headers
+
+    assert client.patch(f"/tasks/{theirs['id']}", json={"title": "x"}, headers=headers).status_code == 404
+    assert client.patch(
+        f"/tasks/{theirs['id']}/assign", json={"assigned_to": tenant.admin.id}, headers=headers
+    ).status_code == 404
+    assert client.get(f"/tasks/{theirs['id']}/history", headers=headers).status_code == 404
+    assert client.delete(f"/tasks/{theirs['id']}", headers=headers).status_code == 404
+
+    still_there = client.get("/tasks/", headers=other_tenant.admin.headers).json()
+    assert [(t["id"], t["title"]) for t in still_there] == [(theirs["id"], "task")]
+
+
+def test_cannot_assign_to_other_company_user(client, tenant, other_tenant):
+    mine = create_task(client, tenant.admin)
+    response = client.patch(
+        f"/tasks/{mine['id']}/assign", json={"assigned_to": other_tenant.admin.id}, headers=tenant.admin.headers
+    )
+    assert response.status_code == 404
+
+
+def test_user_endpoints_only_show_own_company(client, tenant, other_tenant):
+    employee = tenant.add(UserRole.employee)
+    other_tenant.add(UserRole.employee)
+    headers = tenant.admin.headers
+
+    users = client.get("/users/", headers=headers).json()
+    assert {u["id"] for u in users} == {tenant.admin.id, employee.id}
+    users = client.get("/users/?fields=id,email", headers=headers).json()
+    assert {u["id"] for u in users} == {tenant.admin.id, employee.id}
+
+    workload = client.get("/users/workload", headers=headers).json()
+    assert {row["id"] for row in workload} == {tenant.admin.id, employee.id}
+
+    assert client.patch(f"/users/{other_tenant.admin.id}/deactivate", headers=headers).status_code == 404
+
+
+def test_reports_only_count_own_company(client, tenant, other_tenant):
+    create_task(client, tenant.admin)
+    for _ in range(3):
+        create_task(client, other_tenant.admin)
+
+    rows = client.get("/reports/tasks", headers=tenant.admin.headers).json()["rows"]
+    assert sum(row["created"] for row in rows) == 1
+
+
+def test_bound_session_scopes_core_selects(client, tenant, other_tenant):
+    """The hook covers ORM-enabled Core selects, joins and subqueries, not just db.query()."""
+    create_task(client, tenant.admin)
+    create_task(client, other_tenant.admin)
+
+    db = SessionLocal()
+    try:
+        bind_tenant(db, tenant.company_id)
+        assert {t.company_id for t in db.execute(select(Task)).scalars()} == {tenant.company_id}
+        joined = db.execute(select(Task.id, User.email).join(User, User.id == Task.created_by)).all()
+        assert {email for _, email in joined} == {tenant.admin.email}
+        inner = select(Task.id).subquery()
+        assert db.execute(select(inner)).all() == db.execute(select(Task.id)).all()
+        assert len(db.execute(select(Task.id)).all()) == 1
+    finally:
+        db.close()